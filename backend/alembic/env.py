@@ -5,6 +5,9 @@ from database import Base
 from models.questions import Questions
 from models.list_questions import ListQuestionItems, ListQuestions
 from models.answer import Answer
+from models.answer_embedding import AnswerEmbedding
+from models.transcription_job import TranscriptionJob
+from models.video_blob import VideoBlob
 from models.users import User
 
 from sqlalchemy import engine_from_config
@@ -0,0 +1,28 @@
+"""add partial_result to transcription_jobs
+
+Revision ID: a1c6e4f8d27b
+Revises: f2d7a9c41e86
+Create Date: 2026-10-19 09:12:40.284519
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a1c6e4f8d27b'
+down_revision: Union[str, Sequence[str], None] = 'f2d7a9c41e86'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('transcription_jobs', sa.Column('partial_result', sa.Text(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('transcription_jobs', 'partial_result')
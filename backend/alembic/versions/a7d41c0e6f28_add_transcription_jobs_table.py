@@ -0,0 +1,45 @@
+"""add transcription_jobs table
+
+Revision ID: a7d41c0e6f28
+Revises: 5f2c8e1a9b3d
+Create Date: 2026-10-18 10:03:17.204815
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7d41c0e6f28'
+down_revision: Union[str, Sequence[str], None] = '5f2c8e1a9b3d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('transcription_jobs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('answer_id', sa.Integer(), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False, server_default='queued'),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('started_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['answer_id'], ['answers.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_transcription_jobs_id'), 'transcription_jobs', ['id'], unique=False)
+    op.create_index(op.f('ix_transcription_jobs_answer_id'), 'transcription_jobs', ['answer_id'], unique=False)
+    op.create_index(op.f('ix_transcription_jobs_status'), 'transcription_jobs', ['status'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_transcription_jobs_status'), table_name='transcription_jobs')
+    op.drop_index(op.f('ix_transcription_jobs_answer_id'), table_name='transcription_jobs')
+    op.drop_index(op.f('ix_transcription_jobs_id'), table_name='transcription_jobs')
+    op.drop_table('transcription_jobs')
@@ -0,0 +1,28 @@
+"""add status to answers
+
+Revision ID: b3e9f27d5c14
+Revises: a7d41c0e6f28
+Create Date: 2026-10-18 11:20:05.731902
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b3e9f27d5c14'
+down_revision: Union[str, Sequence[str], None] = 'a7d41c0e6f28'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('answers', sa.Column('status', sa.String(length=20), nullable=False, server_default='ready'))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('answers', 'status')
@@ -0,0 +1,28 @@
+"""add derived_media to video_blobs
+
+Revision ID: b7e2d9f4c158
+Revises: a1c6e4f8d27b
+Create Date: 2026-10-19 14:27:05.613892
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7e2d9f4c158'
+down_revision: Union[str, Sequence[str], None] = 'a1c6e4f8d27b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('video_blobs', sa.Column('derived_media', sa.Text(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('video_blobs', 'derived_media')
@@ -0,0 +1,28 @@
+"""add transcript_segments to answers
+
+Revision ID: c81f5a3e07b2
+Revises: b3e9f27d5c14
+Create Date: 2026-10-18 12:41:52.093517
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c81f5a3e07b2'
+down_revision: Union[str, Sequence[str], None] = 'b3e9f27d5c14'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('answers', sa.Column('transcript_segments', sa.Text(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('answers', 'transcript_segments')
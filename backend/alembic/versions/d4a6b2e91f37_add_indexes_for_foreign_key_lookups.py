@@ -0,0 +1,54 @@
+"""add indexes for foreign key lookups
+
+Revision ID: d4a6b2e91f37
+Revises: c81f5a3e07b2
+Create Date: 2026-10-18 13:35:11.648290
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4a6b2e91f37'
+down_revision: Union[str, Sequence[str], None] = 'c81f5a3e07b2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # answers: matching, list_videos_by_user, get_answers_by_user_and_list, list_videos_by_question
+    op.create_index('ix_answers_user_id_question_id', 'answers', ['user_id', 'question_id'], unique=False)
+    op.create_index('ix_answers_user_id_id_list_questions', 'answers', ['user_id', 'id_list_questions'], unique=False)
+    op.create_index(op.f('ix_answers_question_id'), 'answers', ['question_id'], unique=False)
+    op.create_index(op.f('ix_answers_id_list_questions'), 'answers', ['id_list_questions'], unique=False)
+
+    # list_question_items: buang item dobel dulu sebelum unique constraint dipasang
+    op.execute(
+        """
+        DELETE FROM list_question_items a
+        USING list_question_items b
+        WHERE a.list_id = b.list_id
+          AND a.question_id = b.question_id
+          AND a.id_lqi > b.id_lqi
+        """
+    )
+    op.create_unique_constraint('uq_list_question_items_list_id_question_id', 'list_question_items', ['list_id', 'question_id'])
+    op.create_index(op.f('ix_list_question_items_question_id'), 'list_question_items', ['question_id'], unique=False)
+
+    # users: filter / join ke list yang di-assign
+    op.create_index(op.f('ix_users_assigned_list_id'), 'users', ['assigned_list_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_users_assigned_list_id'), table_name='users')
+    op.drop_index(op.f('ix_list_question_items_question_id'), table_name='list_question_items')
+    op.drop_constraint('uq_list_question_items_list_id_question_id', 'list_question_items', type_='unique')
+    op.drop_index(op.f('ix_answers_id_list_questions'), table_name='answers')
+    op.drop_index(op.f('ix_answers_question_id'), table_name='answers')
+    op.drop_index('ix_answers_user_id_id_list_questions', table_name='answers')
+    op.drop_index('ix_answers_user_id_question_id', table_name='answers')
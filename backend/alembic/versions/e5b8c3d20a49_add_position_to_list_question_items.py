@@ -0,0 +1,40 @@
+"""add position to list_question_items
+
+Revision ID: e5b8c3d20a49
+Revises: d4a6b2e91f37
+Create Date: 2026-10-18 16:02:47.311905
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5b8c3d20a49'
+down_revision: Union[str, Sequence[str], None] = 'd4a6b2e91f37'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('list_question_items', sa.Column('position', sa.Integer(), server_default='0', nullable=False))
+    # Item lama: urutan mengikuti urutan insert (id_lqi)
+    op.execute(
+        """
+        UPDATE list_question_items AS lqi
+        SET position = ranked.rn
+        FROM (
+            SELECT id_lqi, ROW_NUMBER() OVER (PARTITION BY list_id ORDER BY id_lqi) - 1 AS rn
+            FROM list_question_items
+        ) AS ranked
+        WHERE lqi.id_lqi = ranked.id_lqi
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('list_question_items', 'position')
@@ -0,0 +1,37 @@
+"""add video_blobs table
+
+Revision ID: f2d7a9c41e86
+Revises: e5b8c3d20a49
+Create Date: 2026-10-18 17:24:09.518372
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2d7a9c41e86'
+down_revision: Union[str, Sequence[str], None] = 'e5b8c3d20a49'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('video_blobs',
+    sa.Column('path', sa.String(length=500), nullable=False),
+    sa.Column('content_hash', sa.String(length=64), nullable=False),
+    sa.Column('size', sa.BigInteger(), nullable=True),
+    sa.Column('ref_count', sa.Integer(), nullable=False, server_default='0'),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.PrimaryKeyConstraint('path')
+    )
+    op.create_index(op.f('ix_video_blobs_content_hash'), 'video_blobs', ['content_hash'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_video_blobs_content_hash'), table_name='video_blobs')
+    op.drop_table('video_blobs')
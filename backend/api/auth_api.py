@@ -1,24 +1,29 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import timedelta
-from database import get_db
+from database import get_async_db
 from models.users import User
 from controller.auth_controller import create_access_token, ACCESS_TOKEN_EXPIRE_MINUTES, get_current_active_user
+from controller.password_controller import verify_password_async
 
 router = APIRouter(
     tags=["Auth"]
 )
 
 @router.post("/login")
-def login(
+async def login(
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Login user (email & password) -> return JWT token
     """
-    user = db.query(User).filter(User.email == form_data.username).first()
+    result = await db.execute(
+        select(User.id_user, User.password).where(User.email == form_data.username)
+    )
+    user = result.first()
 
     if not user:
         raise HTTPException(
@@ -26,13 +31,23 @@ def login(
             detail="Email atau password salah"
         )
     
-    # Cek password pakai method yang ada di model
-    if not user.checkpassword(form_data.password):
+    # Verifikasi di executor hashing supaya tidak memblok event loop / threadpool
+    valid, new_hash = await verify_password_async(user.password, form_data.password)
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email atau password salah"
         )
 
+    # Hash dibuat dengan parameter lama -> simpan ulang dengan setting sekarang
+    if new_hash:
+        await db.execute(
+            update(User)
+            .where(User.id_user == user.id_user, User.password == user.password)
+            .values(password=new_hash)
+        )
+        await db.commit()
+
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
         data={"sub": str(user.id_user)},  # sub harus string
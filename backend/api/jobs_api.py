@@ -1,26 +1,35 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Request
+from pydantic import TypeAdapter
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 import json
 import os
 import uuid
 
-from database import get_db
-from controller import jobs_controller
+from database import get_db, get_async_db
+from controller import jobs_controller, read_cache, storage_backend
 from schemas.jobs import Job, JobCreate
 from controller.auth_controller import admin_required
 from models.users import User
 
 router = APIRouter(tags=["jobs"])
 
+_jobs_adapter = TypeAdapter(List[Job])
+
 @router.get("/", response_model=List[Job])
-def read_jobs(db: Session = Depends(get_db)):
-    return jobs_controller.get_jobs(db)
+async def read_jobs(request: Request, db: AsyncSession = Depends(get_async_db)):
+    async def build():
+        jobs = await jobs_controller.get_jobs(db)
+        return _jobs_adapter.dump_json(_jobs_adapter.validate_python(jobs, from_attributes=True))
+
+    body, etag = await read_cache.get_or_build(read_cache.JOBS_KEY, build)
+    return read_cache.cached_json_response(request, body, etag)
 
 from fastapi import Form
 
 @router.post("/", response_model=Job, dependencies=[Depends(admin_required)])
-async def create_job(
+def create_job(
     db: Session = Depends(get_db),
     title: str = Form(...),
     description: str = Form(...),
@@ -31,18 +40,17 @@ async def create_job(
     sanitized_title = "".join(c for c in title if c.isalnum() or c in [' ']).strip().replace(" ", "_")
     file_extension = os.path.splitext(file.filename)[1]
     image_filename = f"{sanitized_title}{file_extension}"
-    image_path = os.path.join("static/job_images", image_filename)
+    image_key = f"static/job_images/{image_filename}"
 
-    # Save the uploaded file
-    with open(image_path, "wb") as buffer:
-        buffer.write(await file.read())
+    # Save the uploaded file (streaming, tidak dibaca utuh ke memori)
+    storage_backend.get_backend().put_fileobj(file.file, image_key, file.content_type)
 
     # Create a JobCreate schema object
     job_data = JobCreate(
         title=title,
         description=description,
         requirements=json.loads(requirements),
-        image_url=f"/static/job_images/{image_filename}"
+        image_url=f"/{image_key}"
     )
 
     return jobs_controller.create_job(db=db, job=job_data)
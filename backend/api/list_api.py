@@ -1,11 +1,15 @@
 from typing import List
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
+from pydantic import TypeAdapter
 from sqlalchemy.orm import Session
-from database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import get_db, get_async_db
+from controller import read_cache
 
 from controller.list_controller import (
     create_list_with_videos,
     delete_list,
+    get_lists_with_questions,
     get_questions_in_list,
     update_list_with_videos
 )
@@ -14,22 +18,34 @@ from models.questions import Questions
 from schemas.lists import  ListCreate, ListResponse, AddQuestionsToList
 from schemas.question_list import ListWithQuestionsResponse, QuestionInListResponse
 from schemas.questions import QuestionResponse
-from sqlalchemy.orm import joinedload
 
 router = APIRouter(
     tags=["Lists"]
 )
+
+_lists_adapter = TypeAdapter(List[ListWithQuestionsResponse])
 @router.post("/create")
 def create_list(data: ListCreate, db: Session = Depends(get_db)):
-    return create_list_with_videos(db, data)
+    result, error = create_list_with_videos(db, data)
+    if error:
+        raise HTTPException(status_code=400, detail=error)
+    return result
 
 @router.get("/{list_id}/questions", response_model=list[QuestionResponse])
-def get_list_questions(list_id: int, db: Session = Depends(get_db)):
-    return get_questions_in_list(db, list_id)
+async def get_list_questions(list_id: int, db: AsyncSession = Depends(get_async_db)):
+    return await get_questions_in_list(db, list_id)
 
 @router.get("/lists-all", response_model=List[ListWithQuestionsResponse])
-def get_all_lists_with_questions(db: Session = Depends(get_db)):
-    lists_data = db.query(ListQuestions).options(joinedload(ListQuestions.questions)).all()
+async def get_all_lists_with_questions(request: Request, db: AsyncSession = Depends(get_async_db)):
+    async def build():
+        return _lists_adapter.dump_json(await _build_lists_response(db))
+
+    body, etag = await read_cache.get_or_build(read_cache.LISTS_KEY, build)
+    return read_cache.cached_json_response(request, body, etag)
+
+
+async def _build_lists_response(db: AsyncSession):
+    lists_data = await get_lists_with_questions(db)
     
     response_lists = []
     for list_item in lists_data:
@@ -51,9 +67,11 @@ def get_all_lists_with_questions(db: Session = Depends(get_db)):
 
 @router.put("/{list_id}")
 def update_list(list_id: int, data: ListCreate, db: Session = Depends(get_db)):
-    result = update_list_with_videos(db, list_id, data)
-    if not result:
-        raise HTTPException(status_code=404, detail="List tidak ditemukan")
+    result, error = update_list_with_videos(db, list_id, data)
+    if error == "List tidak ditemukan":
+        raise HTTPException(status_code=404, detail=error)
+    if error:
+        raise HTTPException(status_code=400, detail=error)
     return result
 
 @router.delete("/{list_id}")
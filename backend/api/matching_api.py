@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from database import get_db
 from controller import matching_controller
@@ -6,14 +6,30 @@ from controller.auth_controller import admin_required
 
 router = APIRouter(tags=["Matching"])
 
+# Sync def: TF-IDF + encode SentenceTransformer berat di CPU, biar jalan di threadpool
+# dan tidak memblok event loop
 @router.get("/score/{job_id}/{user_id}")
-async def get_matching_score(
+def get_matching_score(
     job_id: int,
     user_id: int,
     db: Session = Depends(get_db),
     # current_user: User = Depends(admin_required) # Only admin can access this for now
 ):
-    score, error = await matching_controller.get_job_matching_score(job_id, user_id, db)
+    score, error = matching_controller.get_job_matching_score(job_id, user_id, db)
     if error:
         raise HTTPException(status_code=404, detail=error)
     return {"job_id": job_id, "user_id": user_id, "score": score}
+
+@router.get("/rank/{job_id}")
+def get_job_ranking(
+    job_id: int,
+    limit: int = Query(20, ge=1, le=500),
+    offset: int = Query(0, ge=0),
+    alpha: float = Query(0.5, ge=0.0, le=1.0),
+    db: Session = Depends(get_db),
+    # current_user: User = Depends(admin_required) # Only admin can access this for now
+):
+    result, error = matching_controller.rank_candidates_for_job(job_id, db, alpha=alpha, limit=limit, offset=offset)
+    if error:
+        raise HTTPException(status_code=404, detail=error)
+    return result
@@ -0,0 +1,24 @@
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import RedirectResponse
+from controller import storage_backend
+
+router = APIRouter(tags=["Media"])
+
+# Dipakai kalau STORAGE_BACKEND bukan local: URL media lama (/videos/..., /static/...)
+# tetap berlaku, client diarahkan ke object storage dan byte file tidak lewat API.
+
+
+def _redirect(key: str):
+    if ".." in key.split("/"):
+        raise HTTPException(status_code=404, detail="File not found")
+    return RedirectResponse(storage_backend.get_backend().url(key), status_code=307)
+
+
+@router.api_route("/videos/{path:path}", methods=["GET", "HEAD"], include_in_schema=False)
+async def redirect_video(path: str):
+    return _redirect(f"videos/{path}")
+
+
+@router.api_route("/static/{path:path}", methods=["GET", "HEAD"], include_in_schema=False)
+async def redirect_static(path: str):
+    return _redirect(f"static/{path}")
@@ -0,0 +1,9 @@
+from fastapi import APIRouter, Depends
+from database import pool_stats
+from controller.auth_controller import admin_required
+
+router = APIRouter(tags=["Metrics"])
+
+@router.get("/db-pool", dependencies=[Depends(admin_required)])
+def get_db_pool_stats():
+    return pool_stats()
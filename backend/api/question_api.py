@@ -1,6 +1,7 @@
 from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
-from database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import get_db, get_async_db
 from schemas.questions import QuestionCreate, QuestionResponse
 
 from controller.question_controller import (
@@ -20,13 +21,13 @@ def create_new_question(data: QuestionCreate, db: Session = Depends(get_db)):
 
 
 @router.get("/", response_model=list[QuestionResponse])
-def list_questions(db: Session = Depends(get_db)):
-    return get_all_questions(db)
+async def list_questions(db: AsyncSession = Depends(get_async_db)):
+    return await get_all_questions(db)
 
 
 @router.get("/{question_id}", response_model=QuestionResponse)
-def get_question(question_id: int, db: Session = Depends(get_db)):
-    result = get_question_by_id(db, question_id)
+async def get_question(question_id: int, db: AsyncSession = Depends(get_async_db)):
+    result = await get_question_by_id(db, question_id)
     if not result:
         return {"message": "Question not found"}
     return result
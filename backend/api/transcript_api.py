@@ -1,13 +1,49 @@
-from fastapi import APIRouter, Depends, HTTPException
+import json
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import select
 from sqlalchemy.orm import Session
-from database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import get_db, get_async_db
 from controller import transcript_controller
+from models.answer import Answer
+from models.transcription_job import TranscriptionStatus
 
 router = APIRouter(tags=["Transcript"])
 
-@router.post("/transcribe/{answer_id}")
-async def transcribe_answer(answer_id: int, db: Session = Depends(get_db)):
-    result = await transcript_controller.transcribe_video(answer_id, db)
-    if not result:
-        raise HTTPException(status_code=500, detail="Failed to start transcription.")
-    return result
+def _job_response(job, answer=None):
+    response = {
+        "job_id": job.id,
+        "answer_id": job.answer_id,
+        "status": job.status,
+        "attempts": job.attempts,
+        "error": job.error,
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at,
+    }
+    if job.status == TranscriptionStatus.done.value and answer:
+        response["transcript"] = answer.transcript
+        response["segments"] = json.loads(answer.transcript_segments) if answer.transcript_segments else []
+    return response
+
+@router.post("/transcribe/{answer_id}", status_code=status.HTTP_202_ACCEPTED)
+def transcribe_answer(answer_id: int, db: Session = Depends(get_db)):
+    job, error = transcript_controller.enqueue_transcription(answer_id, db)
+    if error:
+        status_code = 404 if error == "Answer not found" else 409
+        raise HTTPException(status_code=status_code, detail=error)
+    return _job_response(job)
+
+@router.get("/jobs/{job_id}")
+async def get_transcription_job(job_id: int, db: AsyncSession = Depends(get_async_db)):
+    job = await transcript_controller.get_transcription_job(job_id, db)
+    if not job:
+        raise HTTPException(status_code=404, detail="Transcription job not found")
+
+    answer = None
+    if job.status == TranscriptionStatus.done.value:
+        result = await db.execute(
+            select(Answer.transcript, Answer.transcript_segments).where(Answer.id == job.answer_id)
+        )
+        answer = result.first()
+    return _job_response(job, answer)
@@ -1,29 +1,33 @@
 import os
-import shutil
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response, Request
+from sqlalchemy import select
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from pydantic import BaseModel, EmailStr
-from database import get_db
+from database import get_db, get_async_db
 from models.list_questions import ListQuestions
-from models.users import User, UserRole
+from models.users import User, UserRole, InterviewStatus
 from models.answer import Answer
-from controller.auth_controller import get_current_user, admin_required, complete_interview
-from schemas.users import AssignListRequest, UserCreate, UserResponse, UserUpdate
+from controller.auth_controller import get_current_user, admin_required, complete_interview, invalidate_user_cache
+from controller import storage_controller
+from controller.password_controller import hash_password_async
+from controller.users_controller import to_user_response, get_user_with_list, list_users, parse_import_rows, import_users
+from schemas.users import AssignListRequest, UserCreate, UserResponse, UserUpdate, UserImportResponse
 
 router = APIRouter( tags=["users"])
 
 @router.post("/create", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
 async def create_user(
     user_data: UserCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     # current_user: User = Depends(admin_required)
 ):
     """
     Membuat user baru (hanya admin yang bisa)
     """
     # Cek apakah email sudah terdaftar
-    existing_user = db.query(User).filter(User.email == user_data.email).first()
+    existing_user = await db.scalar(select(User.id_user).where(User.email == user_data.email))
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -46,9 +50,7 @@ async def create_user(
     
     # Validasi: Cek apakah list_id valid jika user biasa
     if user_data.role == "user" and user_data.assigned_list_id:
-        list_exists = db.query(ListQuestions).filter(
-            ListQuestions.id_list_question == user_data.assigned_list_id
-        ).first()
+        list_exists = await db.get(ListQuestions, user_data.assigned_list_id)
         if not list_exists:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -62,98 +64,91 @@ async def create_user(
         role=UserRole.ADMIN if user_data.role == "admin" else UserRole.USER,
         assigned_list_id=user_data.assigned_list_id if user_data.role == "user" else None
     )
-    new_user.setpassword(user_data.password)
+    # Hash di executor hashing, bukan di event loop
+    new_user.password = await hash_password_async(user_data.password)
     
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
-    
-    # Ambil title list jika ada
-    list_title = None
-    if new_user.assigned_list_id:
-        assigned_list = db.query(ListQuestions).filter(
-            ListQuestions.id_list_question == new_user.assigned_list_id
-        ).first()
-        if assigned_list:
-            list_title = assigned_list.list_title
+    await db.commit()
+    # assigned_list dibutuhkan to_user_response
+    new_user = await get_user_with_list(db, new_user.id_user)
     
-    return UserResponse(
-        id_user=new_user.id_user,
-        name=new_user.name,
-        email=new_user.email,
-        role=new_user.role.value,
-        is_active=new_user.is_active,
-        assigned_list_id=new_user.assigned_list_id,
-        assigned_list_title=list_title,
-        interview_status=new_user.interview_status.value
-    )
+    return to_user_response(new_user)
+
+
+@router.post("/import", response_model=UserImportResponse)
+async def import_users_bulk(
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(admin_required)
+):
+    """
+    Bulk import user dari CSV (header: name,email,password,role,assigned_list_id)
+    atau JSON array. Bisa dikirim sebagai body langsung atau multipart field "file".
+    Hasil dilaporkan per baris; baris yang gagal tidak membatalkan baris lain.
+    """
+    content_type = request.headers.get("content-type", "")
+    if content_type.startswith("multipart/form-data"):
+        form = await request.form()
+        upload = form.get("file")
+        if upload is None or isinstance(upload, str):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Field 'file' wajib diisi")
+        content = await upload.read()
+        content_type = "application/json" if upload.filename.lower().endswith(".json") else "text/csv"
+    else:
+        content = await request.body()
+
+    rows, error = parse_import_rows(content, content_type)
+    if error:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=error)
+
+    result, error = await import_users(db, rows)
+    if error:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=error)
+    return result
 
 
 @router.get("/all", response_model=List[UserResponse])
 async def get_all_users(
-    db: Session = Depends(get_db),
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    cursor: Optional[int] = Query(None, description="id_user terakhir dari halaman sebelumnya"),
+    interview_status: Optional[InterviewStatus] = None,
+    role: Optional[UserRole] = None,
+    list_id: Optional[int] = None,
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(admin_required)
 ):
     """
-    Mendapatkan semua user (hanya admin yang bisa)
+    Mendapatkan semua user (hanya admin yang bisa).
+    Kalau limit diisi, cursor halaman berikutnya dikirim di header X-Next-Cursor.
     """
-    users = db.query(User).all()
-    
-    result = []
-    for user in users:
-        list_title = None
-        if user.assigned_list_id:
-            assigned_list = db.query(ListQuestions).filter(
-                ListQuestions.id_list_question == user.assigned_list_id
-            ).first()
-            if assigned_list:
-                list_title = assigned_list.list_title
-        
-        result.append(UserResponse(
-            id_user=user.id_user,
-            name=user.name,
-            email=user.email,
-            role=user.role.value,
-            is_active=user.is_active,
-            assigned_list_id=user.assigned_list_id,
-            assigned_list_title=list_title,
-            interview_status=user.interview_status.value
-        ))
-    
-    return result
+    users, next_cursor = await list_users(
+        db,
+        limit=limit,
+        cursor=cursor,
+        interview_status=interview_status,
+        role=role,
+        list_id=list_id
+    )
+    if next_cursor is not None:
+        response.headers["X-Next-Cursor"] = str(next_cursor)
+
+    return [to_user_response(user) for user in users]
 
 
 @router.get("/me", response_model=UserResponse)
 async def get_current_user_info(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user)
 ):
     """
     Mendapatkan info user yang sedang login
     """
-    list_title = None
-    if current_user.assigned_list_id:
-        assigned_list = db.query(ListQuestions).filter(
-            ListQuestions.id_list_question == current_user.assigned_list_id
-        ).first()
-        if assigned_list:
-            list_title = assigned_list.list_title
-    
-    return UserResponse(
-        id_user=current_user.id_user,
-        name=current_user.name,
-        email=current_user.email,
-        role=current_user.role.value,
-        is_active=current_user.is_active,
-        assigned_list_id=current_user.assigned_list_id,
-        assigned_list_title=list_title,
-        interview_status=current_user.interview_status.value
-    )
+    return to_user_response(current_user)
 
 @router.post("/me/complete-interview", status_code=status.HTTP_200_OK)
 async def complete_current_user_interview(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Menandai interview user yang sedang login sebagai selesai
@@ -163,41 +158,24 @@ async def complete_current_user_interview(
 @router.get("/{user_id}", response_model=UserResponse)
 async def get_user_by_id(
     user_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(admin_required)
 ):
     """
     Mendapatkan detail user berdasarkan ID (hanya admin yang bisa)
     """
-    user = db.query(User).filter(User.id_user == user_id).first()
+    user = await get_user_with_list(db, user_id)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User tidak ditemukan"
         )
     
-    list_title = None
-    if user.assigned_list_id:
-        assigned_list = db.query(ListQuestions).filter(
-            ListQuestions.id_list_question == user.assigned_list_id
-        ).first()
-        if assigned_list:
-            list_title = assigned_list.list_title
-    
-    return UserResponse(
-        id_user=user.id_user,
-        name=user.name,
-        email=user.email,
-        role=user.role.value,
-        is_active=user.is_active,
-        assigned_list_id=user.assigned_list_id,
-        assigned_list_title=list_title,
-        interview_status=user.interview_status.value
-    )
+    return to_user_response(user)
 
 
 @router.put("/{user_id}", response_model=UserResponse)
-async def update_user(
+def update_user(
     user_id: int,
     user_data: UserUpdate,
     db: Session = Depends(get_db),
@@ -269,31 +247,14 @@ async def update_user(
     
     db.commit()
     db.refresh(user)
+    invalidate_user_cache(user.id_user)
     
-    list_title = None
-    if user.assigned_list_id:
-        assigned_list = db.query(ListQuestions).filter(
-            ListQuestions.id_list_question == user.assigned_list_id
-        ).first()
-        if assigned_list:
-            list_title = assigned_list.list_title
-    
-    return UserResponse(
-        id_user=user.id_user,
-        name=user.name,
-        email=user.email,
-        role=user.role.value,
-        is_active=user.is_active,
-        assigned_list_id=user.assigned_list_id,
-        assigned_list_title=list_title,
-        interview_status=user.interview_status.value
-    )
+    return to_user_response(user)
 
 
-import shutil
 
 @router.delete("/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_user(
+def delete_user(
     user_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(admin_required)
@@ -315,22 +276,22 @@ async def delete_user(
             detail="Tidak dapat menghapus akun sendiri"
         )
     
-    # Hapus semua jawaban (answers) yang terkait dengan user
+    # Hapus semua jawaban (answers) yang terkait dengan user; file video di store
+    # hanya dihapus kalau tidak dipakai jawaban / pertanyaan lain
+    video_urls = [url for (url,) in db.query(Answer.video_url).filter(Answer.user_id == user_id)]
+    removable = [url for url in video_urls if storage_controller.release(db, url)]
     db.query(Answer).filter(Answer.user_id == user_id).delete()
     
-    # Delete the user's video directory
-    user_name = user.name.replace(" ", "_")
-    user_video_dir = os.path.join("videos", "kandidat", user_name)
-    if os.path.exists(user_video_dir):
-        shutil.rmtree(user_video_dir)
-        
     db.delete(user)
     db.commit()
+    invalidate_user_cache(user_id)
+    for url in removable:
+        storage_controller.remove_video_files(url)
     return None
 
 
 @router.post("/assign-list", response_model=UserResponse)
-async def assign_list_to_user(
+def assign_list_to_user(
     request: AssignListRequest,
     db: Session = Depends(get_db),
     current_user: User = Depends(admin_required)
@@ -369,22 +330,6 @@ async def assign_list_to_user(
     
     db.commit()
     db.refresh(user)
+    invalidate_user_cache(user.id_user)
     
-    list_title = None
-    if user.assigned_list_id:
-        assigned_list = db.query(ListQuestions).filter(
-            ListQuestions.id_list_question == user.assigned_list_id
-        ).first()
-        if assigned_list:
-            list_title = assigned_list.list_title
-    
-    return UserResponse(
-        id_user=user.id_user,
-        name=user.name,
-        email=user.email,
-        role=user.role.value,
-        is_active=user.is_active,
-        assigned_list_id=user.assigned_list_id,
-        assigned_list_title=list_title,
-        interview_status=user.interview_status.value
-    )
\ No newline at end of file
+    return to_user_response(user)
\ No newline at end of file
@@ -1,33 +1,38 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, Form
+import json
+from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, Form, Request, Query, Response
+from typing import Optional
 from sqlalchemy.orm import Session
-from starlette.responses import FileResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from controller.media_response import serve_stored_video
+from controller.transcode_controller import media_urls_many
 from controller.auth_controller import get_current_active_user
 from models.users import User
-from database import get_db
+from database import get_db, get_async_db
 from models.questions import Questions 
 from controller.video_controller import (get_hr_video, save_hr_video, 
 save_candidate_video, get_candidate_video, list_hr_videos, list_videos_by_user, 
-update_hr_video_title, delete_hr_video_by_id, list_all_candidate_answers, delete_candidate_video, get_answers_by_user_and_list)
+update_hr_video_title, delete_hr_video_by_id, list_all_candidate_answers, OPTIONAL_ANSWER_FIELDS, delete_candidate_video, get_answers_by_user_and_list,
+create_upload_session, get_upload_session, append_upload_chunk, complete_upload_session)
 
 router = APIRouter(tags=["Video Upload"])
 
 @router.put("/questions/{question_id}")
-async def update_hr_video(
+def update_hr_video(
     question_id: int,
     title: str = Form(...),
     db: Session = Depends(get_db)
 ):
-    result = await update_hr_video_title(question_id, title, db)
+    result = update_hr_video_title(question_id, title, db)
     if not result:
         raise HTTPException(status_code=404, detail="Video not found or failed to update")
     return result
 
 @router.delete("/questions/{question_id}")
-async def delete_hr_video(
+def delete_hr_video(
     question_id: int,
     db: Session = Depends(get_db)
 ):
-    result = await delete_hr_video_by_id(question_id, db)
+    result = delete_hr_video_by_id(question_id, db)
     if not result:
         raise HTTPException(status_code=404, detail="Video not found or failed to delete")
     return {"message": "Video deleted successfully"}
@@ -54,53 +59,110 @@ async def upload_candidate_answer(
     filepath, error = await save_candidate_video(current_user.id_user, question_id, file, db)
     if error:
         raise HTTPException(status_code=404, detail=error)
-    return {"message": "Answer video uploaded successfully", "file_path": filepath}
+    return {"message": "Answer video uploaded successfully", "file_path": filepath, "status": "processing"}
+
+# ✅ Resumable upload jawaban kandidat (chunk per chunk)
+@router.post("/answers/uploads")
+def start_candidate_upload(
+    question_id: int = Form(...),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    session, error = create_upload_session(current_user.id_user, question_id, db)
+    if error:
+        raise HTTPException(status_code=404, detail=error)
+    return session
+
+@router.get("/answers/uploads/{upload_id}")
+def get_candidate_upload(
+    upload_id: str,
+    current_user: User = Depends(get_current_active_user)
+):
+    session, error = get_upload_session(upload_id, current_user.id_user)
+    if error:
+        raise HTTPException(status_code=404, detail=error)
+    return session
+
+@router.put("/answers/uploads/{upload_id}")
+async def upload_candidate_chunk(
+    upload_id: str,
+    request: Request,
+    offset: int = Query(..., ge=0),
+    current_user: User = Depends(get_current_active_user)
+):
+    session, status_code, error = await append_upload_chunk(upload_id, current_user.id_user, offset, request.stream())
+    if error:
+        raise HTTPException(status_code=status_code, detail=session or error)
+    return session
+
+@router.post("/answers/uploads/{upload_id}/complete")
+def complete_candidate_upload(
+    upload_id: str,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    filepath, error = complete_upload_session(upload_id, current_user.id_user, db)
+    if error:
+        raise HTTPException(status_code=404, detail=error)
+    return {"message": "Answer video uploaded successfully", "file_path": filepath, "status": "processing"}
 
 # ✅ GET Video HR berdasarkan question_id
 @router.get("/questions/{question_id}/video")
-def fetch_hr_video(question_id: int, db: Session = Depends(get_db)):
-    path, error = get_hr_video(question_id, db)
+async def fetch_hr_video(question_id: int, request: Request, db: AsyncSession = Depends(get_async_db)):
+    path, error = await get_hr_video(question_id, db)
     if error:
         raise HTTPException(status_code=404, detail=error)
-    return FileResponse(path)
+    response = await serve_stored_video(request.headers, path)
+    if response is None:
+        raise HTTPException(status_code=404, detail="File not found")
+    return response
 
 # ✅ GET Video kandidat berdasarkan user_id & question_id
 @router.get("/answers/video")
-def fetch_candidate_video(
+async def fetch_candidate_video(
     user_id: int,
     question_id: int,
-    db: Session = Depends(get_db)
+    request: Request,
+    db: AsyncSession = Depends(get_async_db)
 ):
-    path, error = get_candidate_video(user_id, question_id, db)
+    path, error = await get_candidate_video(user_id, question_id, db)
     if error:
         raise HTTPException(status_code=404, detail=error)
-    return FileResponse(path)
+    response = await serve_stored_video(request.headers, path)
+    if response is None:
+        raise HTTPException(status_code=404, detail="File not found")
+    return response
 
 # ✅ List semua video pertanyaan HR
 @router.get("/videos/hr")
-def get_all_hr_videos(db: Session = Depends(get_db)):
-    questions = list_hr_videos(db)
+async def get_all_hr_videos(db: AsyncSession = Depends(get_async_db)):
+    questions = await list_hr_videos(db)
+    media = await media_urls_many((q.url_video for q in questions), db)
     return [
         {
             "id_question": q.id_question,
             "title": q.question_title,
-            "video_url": q.url_video
+            "video_url": q.url_video,
+            **media.get(q.url_video, {})
         }
         for q in questions
     ]
 
 # ✅ List video berdasarkan user_id
 @router.get("/videos/kandidat/{user_id}")
-def get_videos_by_user(user_id: int, db: Session = Depends(get_db)):
-    results = list_videos_by_user(user_id, db)
+async def get_videos_by_user(user_id: int, db: AsyncSession = Depends(get_async_db)):
+    results = await list_videos_by_user(user_id, db)
     if not results:
         return []
+    media = await media_urls_many((a.video_url for a, _ in results), db)
     return [
         {
             "answer_id": a.id,
             "user_id": a.user_id,
             "question_id": a.question_id,
             "video_url": a.video_url,
+            **media.get(a.video_url, {}),
+            "status": a.status,
             "question": {
                 "title": question_title
             }
@@ -109,13 +171,43 @@ def get_videos_by_user(user_id: int, db: Session = Depends(get_db)):
     ]
 
 @router.get("/answers/all")
-def get_all_answers(db: Session = Depends(get_db)):
-    answers = list_all_candidate_answers(db)
-    return [
-        {
+async def get_all_answers(
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    cursor: Optional[int] = Query(None, description="answer_id terakhir dari halaman sebelumnya"),
+    user_id: Optional[int] = None,
+    question_id: Optional[int] = None,
+    list_id: Optional[int] = None,
+    has_transcript: Optional[bool] = None,
+    fields: Optional[str] = Query(None, description="Kolom tambahan, dipisah koma: transcript,transcript_segments"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    extra_fields = [f.strip() for f in fields.split(",") if f.strip()] if fields else []
+    unknown = [f for f in extra_fields if f not in OPTIONAL_ANSWER_FIELDS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+
+    answers, next_cursor = await list_all_candidate_answers(
+        db,
+        limit=limit,
+        cursor=cursor,
+        user_id=user_id,
+        question_id=question_id,
+        list_id=list_id,
+        has_transcript=has_transcript,
+        fields=extra_fields
+    )
+    if next_cursor is not None:
+        response.headers["X-Next-Cursor"] = str(next_cursor)
+
+    media = await media_urls_many((a.video_url for a in answers), db)
+    results = []
+    for a in answers:
+        item = {
             "answer_id": a.id,
             "video_url": a.video_url,
-            "transcript": a.transcript,
+            **media.get(a.video_url, {}),
+            "status": a.status,
             "user": {
                 "id": a.id_user,
                 "name": a.name,
@@ -126,29 +218,37 @@ def get_all_answers(db: Session = Depends(get_db)):
                 "title": a.question_title,
             }
         }
-        for a in answers
-    ]
+        for f in extra_fields:
+            item[f] = getattr(a, f)
+        if "transcript_segments" in item:
+            # Disimpan sebagai JSON string, kirim sebagai list
+            item["transcript_segments"] = json.loads(item["transcript_segments"]) if item["transcript_segments"] else []
+        results.append(item)
+    return results
 
 @router.delete("/answers/{answer_id}")
-async def delete_answer_video(
+def delete_answer_video(
     answer_id: int,
     db: Session = Depends(get_db)
 ):
     return {"message": "Video deleted successfully"}
 
 @router.get("/answers/{user_id}/{list_id}")
-def get_user_answers_for_list(
+async def get_user_answers_for_list(
     user_id: int,
     list_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    answers = get_answers_by_user_and_list(user_id, list_id, db)
+    answers = await get_answers_by_user_and_list(user_id, list_id, db)
+    media = await media_urls_many((a.video_url for a in answers), db)
     return [
         {
             "answer_id": a.id,
             "user_id": a.user_id,
             "question_id": a.question_id,
-            "video_url": a.video_url
+            "video_url": a.video_url,
+            **media.get(a.video_url, {}),
+            "status": a.status
         }
         for a in answers
     ]
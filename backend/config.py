@@ -15,16 +15,111 @@ class Settings(BaseSettings):
 
     # Database
     database_url: str = Field(env="DATABASE_URL")
+    # Kosong = diturunkan dari DATABASE_URL (postgresql -> postgresql+asyncpg)
+    async_database_url: str = Field("", env="ASYNC_DATABASE_URL")
+    db_pool_size: int = Field(5, env="DB_POOL_SIZE")
+    db_max_overflow: int = Field(10, env="DB_MAX_OVERFLOW")
+    db_pool_timeout: int = Field(30, env="DB_POOL_TIMEOUT")
+    db_pool_recycle: int = Field(1800, env="DB_POOL_RECYCLE")
+    db_pool_pre_ping: bool = Field(True, env="DB_POOL_PRE_PING")
+    # 0 = tanpa batas (hanya berlaku untuk PostgreSQL)
+    db_statement_timeout_ms: int = Field(0, env="DB_STATEMENT_TIMEOUT_MS")
+    db_echo: bool = Field(False, env="DB_ECHO")
+    # Pool terpisah untuk pekerjaan background (transcription, transcoding),
+    # supaya session yang lama tidak menghabiskan pool request
+    db_background_pool_size: int = Field(2, env="DB_BACKGROUND_POOL_SIZE")
+    db_background_max_overflow: int = Field(2, env="DB_BACKGROUND_MAX_OVERFLOW")
 
     # Upload
     upload_folder: str = Field("uploads/videos", env="UPLOAD_FOLDER")
     static_url: str = Field("http://localhost:8000/uploads/videos", env="STATIC_URL")
+    upload_chunk_size: int = Field(1024 * 1024, env="UPLOAD_CHUNK_SIZE")
+    max_upload_size_mb: int = Field(1024, env="MAX_UPLOAD_SIZE_MB")
+    # Sesi resumable upload (chunk .part + metadata), jangan di bawah folder yang di-mount
+    upload_session_dir: str = Field("uploads/sessions", env="UPLOAD_SESSION_DIR")
+    # Sesi yang tidak menerima chunk selama ini dihapus
+    upload_session_ttl_hours: float = Field(24.0, env="UPLOAD_SESSION_TTL_HOURS")
+    # Storage video content-addressed (harus di bawah folder "videos" yang di-mount)
+    video_store_dir: str = Field("videos/store", env="VIDEO_STORE_DIR")
+    # Cache-Control untuk file video; browser tetap revalidate via ETag / Last-Modified
+    video_cache_control: str = Field("private, max-age=3600", env="VIDEO_CACHE_CONTROL")
+    # File di video store tidak pernah berubah isinya
+    video_store_cache_control: str = Field("private, max-age=31536000, immutable", env="VIDEO_STORE_CACHE_CONTROL")
+
+    # Storage media (video + gambar job): "local" (disk node ini) atau "s3" (S3-compatible: AWS, MinIO, R2, ...)
+    storage_backend: str = Field("local", env="STORAGE_BACKEND")
+    s3_bucket: str = Field("", env="S3_BUCKET")
+    s3_endpoint_url: str = Field("", env="S3_ENDPOINT_URL")
+    s3_region: str = Field("us-east-1", env="S3_REGION")
+    s3_access_key: str = Field("", env="S3_ACCESS_KEY")
+    s3_secret_key: str = Field("", env="S3_SECRET_KEY")
+    # Prefix key di dalam bucket, kosong = root bucket
+    s3_prefix: str = Field("", env="S3_PREFIX")
+    # "path" untuk MinIO / endpoint tanpa wildcard DNS
+    s3_addressing_style: str = Field("auto", env="S3_ADDRESSING_STYLE")
+    s3_presign_expires: int = Field(3600, env="S3_PRESIGN_EXPIRES")
+    # Base URL publik (CDN / bucket public-read). Kalau diisi, URL media tidak di-presign;
+    # wajib untuk HLS karena playlist merujuk segmen dengan path relatif.
+    storage_public_url: str = Field("", env="STORAGE_PUBLIC_URL")
+
+    # Bulk import user (POST /users/import)
+    user_import_max_rows: int = Field(10000, env="USER_IMPORT_MAX_ROWS")
+
+    # Matching
+    # Load + warm-up model embedding saat startup (default: lazy di request pertama)
+    embed_model_warmup: bool = Field(False, env="EMBED_MODEL_WARMUP")
+
+    # Transcoding (webm -> mp4) di background
+    # 0 = otomatis, ikut jumlah core
+    transcode_workers: int = Field(0, env="TRANSCODE_WORKERS")
+    transcode_preset: str = Field("veryfast", env="TRANSCODE_PRESET")
+    transcode_crf: int = Field(23, env="TRANSCODE_CRF")
+    # Source upload disimpan di sini sampai transcode selesai (diulang saat startup kalau proses mati)
+    transcode_pending_dir: str = Field("uploads/pending", env="TRANSCODE_PENDING_DIR")
+    # File scratch (upload sementara, output ffmpeg) lebih tua dari ini dihapus saat startup
+    scratch_ttl_hours: float = Field(6.0, env="SCRATCH_TTL_HOURS")
+    # Rendition tambahan untuk jawaban kandidat (dibuat setelah video utama ready)
+    transcode_preview: bool = Field(False, env="TRANSCODE_PREVIEW")
+    transcode_hls: bool = Field(False, env="TRANSCODE_HLS")
+    preview_height: int = Field(360, env="PREVIEW_HEIGHT")
+    preview_video_bitrate: str = Field("400k", env="PREVIEW_VIDEO_BITRATE")
+    preview_audio_bitrate: str = Field("64k", env="PREVIEW_AUDIO_BITRATE")
+    hls_segment_seconds: int = Field(4, env="HLS_SEGMENT_SECONDS")
+    # Poster + sprite sheet (seek preview) untuk grid admin
+    thumbnails_enabled: bool = Field(True, env="THUMBNAILS_ENABLED")
+    thumbnail_webp: bool = Field(True, env="THUMBNAIL_WEBP")
+    poster_width: int = Field(480, env="POSTER_WIDTH")
+    poster_offset_seconds: float = Field(1.0, env="POSTER_OFFSET_SECONDS")
+    sprite_interval_seconds: int = Field(10, env="SPRITE_INTERVAL_SECONDS")
+    sprite_tile_width: int = Field(160, env="SPRITE_TILE_WIDTH")
+    sprite_columns: int = Field(10, env="SPRITE_COLUMNS")
+
+    # Transcription queue
+    transcription_workers: int = Field(2, env="TRANSCRIPTION_WORKERS")
+    transcription_poll_interval: float = Field(2.0, env="TRANSCRIPTION_POLL_INTERVAL")
+    # Job "running" lebih lama dari ini dianggap worker-nya mati dan di-queue ulang
+    transcription_stale_minutes: int = Field(30, env="TRANSCRIPTION_STALE_MINUTES")
+    transcription_max_attempts: int = Field(3, env="TRANSCRIPTION_MAX_ATTEMPTS")
 
     # CORS
     allowed_origins: str = Field("http://localhost:5173", env="ALLOWED_ORIGINS")
 
     # Security (optional)
     secret_key: str = Field("supersecret", env="SECRET_KEY")
+    # Hash password (format method werkzeug, mis. "scrypt", "scrypt:65536:8:1",
+    # "pbkdf2:sha256:600000"). Hash lama di-upgrade otomatis saat login.
+    password_hash_method: str = Field("scrypt", env="PASSWORD_HASH_METHOD")
+    # Method untuk bulk import (kosong = sama dengan PASSWORD_HASH_METHOD). Boleh
+    # lebih ringan; hash-nya di-upgrade ke PASSWORD_HASH_METHOD saat login pertama.
+    password_import_hash_method: str = Field("", env="PASSWORD_IMPORT_HASH_METHOD")
+    # 0 = otomatis, ikut jumlah core
+    password_hash_workers: int = Field(0, env="PASSWORD_HASH_WORKERS")
+    # Cache /jobs/ dan /list/lists-all per proses (detik, 0 = tanpa cache).
+    # Invalidasi langsung di proses yang melakukan perubahan; proses lain ikut TTL.
+    read_cache_ttl: float = Field(60.0, env="READ_CACHE_TTL")
+    # Cache user untuk get_current_user (detik, 0 = selalu ambil dari DB)
+    auth_user_cache_ttl: float = Field(30.0, env="AUTH_USER_CACHE_TTL")
+    auth_user_cache_size: int = Field(10000, env="AUTH_USER_CACHE_SIZE")
 
     class Config:
         env_file = ".env"
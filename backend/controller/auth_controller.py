@@ -1,11 +1,17 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 from jose import JWTError, jwt
 import os
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta
 from typing import Optional
-from database import get_db
+from config import settings
+from database import get_async_db
 from models.users import User, UserRole, InterviewStatus
 
 # Konfigurasi
@@ -15,6 +21,48 @@ ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
 security = HTTPBearer()
 
+# Cache user per proses: user_id -> (expires_at, User terlepas dari session).
+# Objek di cache dipakai bersama antar request, jadi perlakukan sebagai read-only.
+_user_cache: "OrderedDict[int, tuple[float, User]]" = OrderedDict()
+_user_cache_lock = threading.Lock()
+
+
+def _get_cached_user(user_id: int) -> Optional[User]:
+    if settings.auth_user_cache_ttl <= 0:
+        return None
+    with _user_cache_lock:
+        entry = _user_cache.get(user_id)
+        if entry is None:
+            return None
+        expires_at, user = entry
+        if expires_at < time.monotonic():
+            del _user_cache[user_id]
+            return None
+        _user_cache.move_to_end(user_id)
+        return user
+
+
+def _cache_user(user: User):
+    if settings.auth_user_cache_ttl <= 0:
+        return
+    with _user_cache_lock:
+        _user_cache[user.id_user] = (time.monotonic() + settings.auth_user_cache_ttl, user)
+        _user_cache.move_to_end(user.id_user)
+        while len(_user_cache) > settings.auth_user_cache_size:
+            _user_cache.popitem(last=False)
+
+
+def invalidate_user_cache(user_id: Optional[int] = None):
+    """
+    Hapus user dari cache auth (semua user jika user_id None).
+    Dipanggil setiap kali baris user diubah / dihapus.
+    """
+    with _user_cache_lock:
+        if user_id is None:
+            _user_cache.clear()
+        else:
+            _user_cache.pop(user_id, None)
+
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """
@@ -33,7 +81,7 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
 
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> User:
     """
     Mendapatkan user yang sedang login dari JWT token
@@ -47,15 +95,24 @@ async def get_current_user(
     try:
         token = credentials.credentials
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id: int = payload.get("sub")
+        user_id = payload.get("sub")
         if user_id is None:
             raise credentials_exception
-    except JWTError:
+        user_id = int(user_id)
+    except (JWTError, ValueError):
         raise credentials_exception
     
-    user = db.query(User).filter(User.id_user == user_id).first()
+    user = _get_cached_user(user_id)
     if user is None:
-        raise credentials_exception
+        # assigned_list ikut di-load supaya bisa dibaca tanpa lazy load (async session)
+        result = await db.execute(
+            select(User).options(selectinload(User.assigned_list)).where(User.id_user == user_id)
+        )
+        user = result.scalars().first()
+        if user is None:
+            raise credentials_exception
+        db.expunge(user)
+        _cache_user(user)
     
     if not user.is_active:
         raise HTTPException(
@@ -93,7 +150,7 @@ async def get_current_active_user(
         )
     return current_user
 
-async def complete_interview(user: User, db: Session):
+async def complete_interview(user: User, db: AsyncSession):
     """
     Menandai interview user sebagai selesai
     """
@@ -103,6 +160,12 @@ async def complete_interview(user: User, db: Session):
             detail="Interview not in progress"
         )
     
-    user.interview_status = InterviewStatus.completed
-    db.commit()
+    # user bisa berasal dari cache (terlepas dari session), jadi update lewat query
+    await db.execute(
+        update(User)
+        .where(User.id_user == user.id_user)
+        .values(interview_status=InterviewStatus.completed)
+    )
+    await db.commit()
+    invalidate_user_cache(user.id_user)
     return {"message": "Interview completed successfully"}
\ No newline at end of file
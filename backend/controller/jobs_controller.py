@@ -1,11 +1,14 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 import json
-import os
 from models.jobs import Job
 from schemas.jobs import JobCreate
+from controller import read_cache, storage_backend
 
-def get_jobs(db: Session):
-    return db.query(Job).all()
+async def get_jobs(db: AsyncSession):
+    result = await db.execute(select(Job))
+    return result.scalars().all()
 
 def create_job(db: Session, job: JobCreate):
     db_job = Job(
@@ -17,6 +20,7 @@ def create_job(db: Session, job: JobCreate):
     db.add(db_job)
     db.commit()
     db.refresh(db_job)
+    read_cache.invalidate(read_cache.JOBS_KEY)
     return db_job
 
 def update_job(db: Session, job_id: int, job: JobCreate):
@@ -24,9 +28,7 @@ def update_job(db: Session, job_id: int, job: JobCreate):
     if db_job:
         # If the image is updated, delete the old one
         if db_job.image_url and db_job.image_url != job.image_url:
-            old_image_path = db_job.image_url.lstrip("/")
-            if os.path.exists(old_image_path):
-                os.remove(old_image_path)
+            storage_backend.delete_later([db_job.image_url.lstrip("/")])
 
         db_job.title = job.title
         db_job.description = job.description
@@ -34,6 +36,7 @@ def update_job(db: Session, job_id: int, job: JobCreate):
         db_job.image_url = job.image_url
         db.commit()
         db.refresh(db_job)
+        read_cache.invalidate(read_cache.JOBS_KEY)
     return db_job
 
 def delete_job(db: Session, job_id: int):
@@ -41,10 +44,9 @@ def delete_job(db: Session, job_id: int):
     if db_job:
         # Delete associated image file if it exists
         if db_job.image_url:
-            # Construct the correct path to the image file
-            image_path = db_job.image_url.lstrip("/")
-            if os.path.exists(image_path):
-                os.remove(image_path)
+            # image_url = "/" + key storage
+            storage_backend.delete_later([db_job.image_url.lstrip("/")])
         db.delete(db_job)
         db.commit()
+        read_cache.invalidate(read_cache.JOBS_KEY)
     return db_job
@@ -1,75 +1,126 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import select, insert, update, delete
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
 from models.list_questions import ListQuestions, ListQuestionItems
 from models.questions import Questions
 from schemas.lists import ListCreate, AddQuestionsToList
+from controller import read_cache
 from typing import List
 
 
+def _validate_question_ids(db: Session, video_ids: List[int]):
+    """
+    Dedup video_ids (urutan pertama dipertahankan) dan cek semuanya ada
+    dalam satu query. Return (question_ids, error).
+    """
+    question_ids = list(dict.fromkeys(video_ids))
+    if not question_ids:
+        return question_ids, None
+
+    found = set(db.scalars(
+        select(Questions.id_question).where(Questions.id_question.in_(question_ids))
+    ).all())
+    missing = [qid for qid in question_ids if qid not in found]
+    if missing:
+        return None, f"Pertanyaan tidak ditemukan: {missing}"
+    return question_ids, None
+
+
 def create_list_with_videos(db: Session, data: ListCreate):
+    question_ids, error = _validate_question_ids(db, data.video_ids)
+    if error:
+        return None, error
+
     new_list = ListQuestions(list_title=data.list_title, minutes=data.minutes)
     db.add(new_list)
-    db.commit()
-    db.refresh(new_list)
-
-    for vid in data.video_ids:
-        db.add(
-            ListQuestionItems(
-                list_id=new_list.id_list_question,
-                question_id=vid
-            )
-        )
+    db.flush()
 
-    db.commit()
-    return {
+    # Satu INSERT (executemany) untuk semua item, satu commit untuk list + item
+    if question_ids:
+        db.execute(insert(ListQuestionItems), [
+            {"list_id": new_list.id_list_question, "question_id": qid, "position": pos}
+            for pos, qid in enumerate(question_ids)
+        ])
+
+    result = {
         "id": new_list.id_list_question,
         "name": new_list.list_title,
-        "videos_added": len(data.video_ids)
+        "videos_added": len(question_ids)
     }
+    db.commit()
+    read_cache.invalidate(read_cache.LISTS_KEY)
+    return result, None
 
 
-def get_questions_in_list(db: Session, list_id: int):
-    return (
-        db.query(Questions)
+async def get_questions_in_list(db: AsyncSession, list_id: int):
+    result = await db.execute(
+        select(Questions)
         .join(ListQuestionItems, ListQuestionItems.question_id == Questions.id_question)
-        .filter(ListQuestionItems.list_id == list_id)
-        .all()
+        .where(ListQuestionItems.list_id == list_id)
+        .order_by(ListQuestionItems.position, ListQuestionItems.id_lqi)
     )
+    return result.scalars().all()
+
+
+async def get_lists_with_questions(db: AsyncSession):
+    result = await db.execute(
+        select(ListQuestions).options(selectinload(ListQuestions.questions))
+    )
+    return result.scalars().all()
 
 def update_list_with_videos(db: Session, list_id: int, data: ListCreate):
     # Cari list yang akan diupdate
-    list_to_update = db.query(ListQuestions).filter(
-        ListQuestions.id_list_question == list_id
-    ).first()
-    
+    list_to_update = db.get(ListQuestions, list_id)
     if not list_to_update:
-        return None
-    
+        return None, "List tidak ditemukan"
+
+    question_ids, error = _validate_question_ids(db, data.video_ids)
+    if error:
+        return None, error
+
     # Update title
     list_to_update.list_title = data.list_title
     list_to_update.minutes = data.minutes
-    
-    # Hapus semua video lama dari list
-    db.query(ListQuestionItems).filter(
-        ListQuestionItems.list_id == list_id
-    ).delete()
-    
-    # Tambahkan video baru
-    for vid in data.video_ids:
-        db.add(
-            ListQuestionItems(
-                list_id=list_id,
-                question_id=vid
-            )
+
+    # Diff dengan item yang sudah ada: hanya item yang berubah yang disentuh
+    existing = {
+        qid: (id_lqi, pos)
+        for id_lqi, qid, pos in db.execute(
+            select(ListQuestionItems.id_lqi, ListQuestionItems.question_id, ListQuestionItems.position)
+            .where(ListQuestionItems.list_id == list_id)
         )
-    
-    db.commit()
-    db.refresh(list_to_update)
-    
-    return {
-        "id_list_question": list_to_update.id_list_question,
-        "list_title": list_to_update.list_title,
-        "videos_updated": len(data.video_ids)
     }
+    wanted = {qid: pos for pos, qid in enumerate(question_ids)}
+
+    removed = [existing[qid][0] for qid in existing if qid not in wanted]
+    added = [
+        {"list_id": list_id, "question_id": qid, "position": pos}
+        for qid, pos in wanted.items() if qid not in existing
+    ]
+    moved = [
+        {"id_lqi": existing[qid][0], "position": pos}
+        for qid, pos in wanted.items() if qid in existing and existing[qid][1] != pos
+    ]
+
+    if removed:
+        db.execute(delete(ListQuestionItems).where(ListQuestionItems.id_lqi.in_(removed)))
+    if added:
+        db.execute(insert(ListQuestionItems), added)
+    if moved:
+        # Bulk UPDATE by primary key (executemany)
+        db.execute(update(ListQuestionItems), moved)
+
+    result = {
+        "id_list_question": list_id,
+        "list_title": data.list_title,
+        "videos_updated": len(question_ids),
+        "videos_added": len(added),
+        "videos_removed": len(removed),
+        "videos_moved": len(moved)
+    }
+    db.commit()
+    read_cache.invalidate(read_cache.LISTS_KEY)
+    return result, None
 
 
 def delete_list(db: Session, list_id: int):
@@ -88,5 +139,6 @@ def delete_list(db: Session, list_id: int):
     
     db.delete(list_to_delete)
     db.commit()
+    read_cache.invalidate(read_cache.LISTS_KEY)
     
     return {"message": "List berhasil dihapus", "id": list_id}
\ No newline at end of file
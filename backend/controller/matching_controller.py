@@ -1,5 +1,9 @@
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 import json
+import hashlib
+import threading
+import time
 import numpy as np
 import pandas as pd
 from sklearn.feature_extraction.text import TfidfVectorizer
@@ -7,10 +11,31 @@ from sklearn.metrics.pairwise import cosine_similarity
 from models.jobs import Job
 from models.answer import Answer
 from models.users import User
-from typing import List, Dict
-from sentence_transformers import SentenceTransformer
+from models.answer_embedding import AnswerEmbedding
+from typing import List, Dict, Optional
 
-embed_model = SentenceTransformer('paraphrase-multilingual-MiniLM-L12-v2')
+EMBED_MODEL_NAME = 'paraphrase-multilingual-MiniLM-L12-v2'
+
+# Model baru di-load saat request matching pertama (atau saat warm-up),
+# bukan saat import, supaya worker yang tidak melayani matching tetap ringan.
+_embed_model = None
+_embed_model_lock = threading.Lock()
+
+def get_embed_model():
+    global _embed_model
+    if _embed_model is None:
+        with _embed_model_lock:
+            if _embed_model is None:
+                from sentence_transformers import SentenceTransformer
+                start = time.perf_counter()
+                _embed_model = SentenceTransformer(EMBED_MODEL_NAME)
+                print(f"Embedding model {EMBED_MODEL_NAME} loaded in {time.perf_counter() - start:.2f}s")
+    return _embed_model
+
+def warm_up_embed_model():
+    start = time.perf_counter()
+    get_embed_model().encode(["warm up"])
+    print(f"Embedding model warm-up finished in {time.perf_counter() - start:.2f}s")
 
 def eval_rank(labels_sorted: List[int], k: int = 10) -> Dict[str, float]:
 
@@ -18,50 +43,141 @@ def eval_rank(labels_sorted: List[int], k: int = 10) -> Dict[str, float]:
     precision_at_k = relevant_count / k if k > 0 else 0
     return {"precision_at_k": precision_at_k}
 
-def score_one_job(job_id, jd_text, cv_texts, alpha, k_eval=10):
+def _text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+def _normalize(embs: np.ndarray) -> np.ndarray:
+    embs = np.asarray(embs, dtype=np.float32)
+    norms = np.linalg.norm(embs, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return embs / norms
+
+def get_answer_embeddings(db: Session, answers) -> Dict[int, np.ndarray]:
+    """
+    Embedding per answer dari tabel answer_embeddings. Answer yang belum punya
+    embedding, atau transcript-nya berubah (hash beda), di-encode ulang
+    sekaligus dalam satu batch lalu disimpan.
+    """
+    answer_ids = [a.id for a in answers]
+    stored = {
+        e.answer_id: e
+        for e in db.query(AnswerEmbedding).filter(AnswerEmbedding.answer_id.in_(answer_ids)).all()
+    } if answer_ids else {}
+
+    result: Dict[int, np.ndarray] = {}
+    stale = []
+    for answer in answers:
+        content_hash = _text_hash(answer.transcript)
+        row = stored.get(answer.id)
+        if row and row.content_hash == content_hash and row.model_name == EMBED_MODEL_NAME:
+            result[answer.id] = np.frombuffer(row.embedding, dtype=np.float32)
+        else:
+            stale.append((answer, content_hash, row))
+
+    if stale:
+        new_embs = _normalize(get_embed_model().encode([answer.transcript for answer, _, _ in stale]))
+        new_rows = []
+        for (answer, content_hash, row), emb in zip(stale, new_embs):
+            if row is None:
+                row = AnswerEmbedding(answer_id=answer.id)
+                new_rows.append(row)
+            row.content_hash = content_hash
+            row.model_name = EMBED_MODEL_NAME
+            row.embedding = emb.tobytes()
+            result[answer.id] = emb
+        try:
+            with db.begin_nested():
+                db.add_all(new_rows)
+        except IntegrityError:
+            # Ranking lain yang jalan bersamaan sudah menyimpan embedding answer
+            # yang sama: timpa barisnya (isinya sama) alih-alih gagal
+            for row in new_rows:
+                db.merge(row)
+        db.commit()
+
+    return result
+
+def build_candidate_matrix(db: Session, answers_by_user: Dict[int, list]) -> np.ndarray:
+    """
+    Matriks embedding kandidat (N x dim), urut sesuai answers_by_user.
+    Embedding kandidat = rata-rata embedding answer-nya, dinormalisasi ulang.
+    """
+    all_answers = [a for answers in answers_by_user.values() for a in answers]
+    answer_embs = get_answer_embeddings(db, all_answers)
+    rows = [
+        np.mean([answer_embs[a.id] for a in answers], axis=0)
+        for answers in answers_by_user.values()
+    ]
+    return _normalize(np.vstack(rows))
+
+def score_one_job(job_id, jd_text, cv_texts, alpha, k_eval=10, cv_embs: Optional[np.ndarray] = None, cv_ids: Optional[List[int]] = None):
 
     tfidf = TfidfVectorizer(max_features=11000, ngram_range=(1,2))
     X = tfidf.fit_transform(cv_texts + [jd_text])
     tfidf_sims = cosine_similarity(X[:-1], X[-1]).ravel()
 
-    embs = embed_model.encode([jd_text] + cv_texts)
-    emb_sims = cosine_similarity(embs[0:1], embs[1:]).ravel()
+    if cv_embs is None:
+        embs = get_embed_model().encode([jd_text] + cv_texts)
+        emb_sims = cosine_similarity(embs[0:1], embs[1:]).ravel()
+    else:
+        # cv_embs sudah dinormalisasi, jadi cosine similarity cukup dot product
+        jd_emb = _normalize(get_embed_model().encode([jd_text]))[0]
+        emb_sims = cv_embs @ jd_emb
 
     final = alpha*tfidf_sims + (1-alpha)*emb_sims
     idx = np.argsort(-final)
 
     metrics = {}
 
-    table = pd.DataFrame({
+    data = {
         "rank": np.arange(1, len(idx)+1),
         "tfidf": np.round(tfidf_sims[idx], 4),
         "embed": np.round(emb_sims[idx], 4),
         "final": np.round(final[idx], 4),
         "cv_text": np.array(cv_texts)[idx]
-    })
+    }
+    if cv_ids is not None:
+        data["cv_id"] = np.array(cv_ids)[idx]
+    table = pd.DataFrame(data)
 
     return metrics, table
 
-async def get_job_matching_score(job_id: int, user_id: int, db: Session, alpha: float = 0.5):
+def _answers_with_transcripts(db: Session, user_id: Optional[int] = None) -> Dict[int, list]:
+    query = (
+        db.query(Answer.id, Answer.user_id, Answer.transcript)
+        .filter(Answer.transcript.isnot(None), Answer.transcript != "")
+    )
+    if user_id is not None:
+        query = query.filter(Answer.user_id == user_id)
+
+    answers_by_user: Dict[int, list] = {}
+    for answer in query.order_by(Answer.user_id, Answer.id).all():
+        answers_by_user.setdefault(answer.user_id, []).append(answer)
+    return answers_by_user
+
+def get_job_matching_score(job_id: int, user_id: int, db: Session, alpha: float = 0.5):
     job = db.query(Job).filter(Job.id == job_id).first()
     if not job:
         return None, "Job not found"
 
-    user_answers = db.query(Answer).filter(Answer.user_id == user_id).all()
-    if not user_answers:
+    has_answers = db.query(Answer.id).filter(Answer.user_id == user_id).first()
+    if not has_answers:
         return None, "User has no video answers/transcripts"
 
-    combined_transcript = " ".join([answer.transcript for answer in user_answers if answer.transcript])
-    if not combined_transcript:
+    answers_by_user = _answers_with_transcripts(db, user_id=user_id)
+    if not answers_by_user:
         return None, "User has no transcripts available"
 
+    combined_transcript = " ".join(a.transcript for a in answers_by_user[user_id])
+
     jd_text = " ".join(json.loads(job.requirements))
 
     metrics, table = score_one_job(
         job_id=job_id,
         jd_text=jd_text,
-        cv_texts=[combined_transcript], 
-        alpha=alpha
+        cv_texts=[combined_transcript],
+        alpha=alpha,
+        cv_embs=build_candidate_matrix(db, answers_by_user)
     )
     
     if not table.empty:
@@ -69,3 +185,57 @@ async def get_job_matching_score(job_id: int, user_id: int, db: Session, alpha:
         return score, None
     
     return 0.0, "Could not calculate score"
+
+def rank_candidates_for_job(job_id: int, db: Session, alpha: float = 0.5, limit: int = 20, offset: int = 0):
+    """
+    Meranking semua kandidat yang punya transcript terhadap satu job
+    dalam satu pass (satu fit TF-IDF, satu dot product embedding).
+    """
+    job = db.query(Job).filter(Job.id == job_id).first()
+    if not job:
+        return None, "Job not found"
+
+    answers_by_user = _answers_with_transcripts(db)
+    if not answers_by_user:
+        return None, "No candidates with transcripts available"
+
+    user_ids = list(answers_by_user.keys())
+    cv_texts = [" ".join(a.transcript for a in answers_by_user[uid]) for uid in user_ids]
+    jd_text = " ".join(json.loads(job.requirements))
+
+    metrics, table = score_one_job(
+        job_id=job_id,
+        jd_text=jd_text,
+        cv_texts=cv_texts,
+        alpha=alpha,
+        cv_embs=build_candidate_matrix(db, answers_by_user),
+        cv_ids=user_ids
+    )
+
+    page = table.iloc[offset:offset + limit]
+    page_ids = [int(uid) for uid in page["cv_id"]]
+    users = {
+        u.id_user: u
+        for u in db.query(User).filter(User.id_user.in_(page_ids)).all()
+    } if page_ids else {}
+
+    results = []
+    for row in page.itertuples(index=False):
+        user = users.get(int(row.cv_id))
+        results.append({
+            "rank": int(row.rank),
+            "user_id": int(row.cv_id),
+            "name": user.name if user else None,
+            "email": user.email if user else None,
+            "tfidf": float(row.tfidf),
+            "embed": float(row.embed),
+            "score": float(row.final) * 100
+        })
+
+    return {
+        "job_id": job_id,
+        "total": len(table),
+        "offset": offset,
+        "limit": limit,
+        "results": results
+    }, None
@@ -0,0 +1,237 @@
+import os
+import secrets
+from email.utils import parsedate
+from typing import List, Optional, Tuple
+import anyio
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, RedirectResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from config import settings
+from controller import storage_backend
+
+# Lebih dari ini (setelah range yang overlap digabung) dianggap abuse -> kirim file utuh
+MAX_RANGES = 16
+CHUNK_SIZE = 256 * 1024
+
+Range = Tuple[int, int]  # (start, end) inklusif
+
+
+def parse_range_header(range_header: str, size: int) -> Optional[List[Range]]:
+    """
+    Parse header Range (RFC 9110 14.1.2).
+    Return None jika header tidak valid / diabaikan (kirim 200 utuh),
+    [] jika tidak ada range yang bisa dipenuhi (416), selain itu list range terurut.
+    """
+    unit, _, specs = range_header.partition("=")
+    if unit.strip().lower() != "bytes" or not specs:
+        return None
+
+    ranges = []
+    for spec in specs.split(","):
+        spec = spec.strip()
+        if not spec:
+            continue
+        first, sep, last = spec.partition("-")
+        if not sep:
+            return None
+        first, last = first.strip(), last.strip()
+        try:
+            if first:
+                start = int(first)
+                end = int(last) if last else None
+                if start < 0 or (end is not None and end < start):
+                    return None
+                if end is None:
+                    end = size - 1
+            else:
+                # suffix range: N byte terakhir
+                length = int(last)
+                if length <= 0:
+                    continue
+                start, end = max(0, size - length), size - 1
+        except ValueError:
+            return None
+        if start >= size:
+            continue
+        ranges.append((start, min(end, size - 1)))
+
+    ranges.sort()
+    merged = []
+    for start, end in ranges:
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    if len(merged) > MAX_RANGES:
+        return None
+    return merged
+
+
+def _is_not_modified(response_headers: Headers, request_headers: Headers) -> bool:
+    if_none_match = request_headers.get("if-none-match")
+    if if_none_match is not None:
+        # If-None-Match menang atas If-Modified-Since
+        etag = response_headers["etag"]
+        return if_none_match.strip() == "*" or etag in [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+
+    if_modified_since = parsedate(request_headers.get("if-modified-since", ""))
+    last_modified = parsedate(response_headers["last-modified"])
+    return if_modified_since is not None and last_modified is not None and if_modified_since >= last_modified
+
+
+def _if_range_matches(if_range: Optional[str], response_headers: Headers) -> bool:
+    if if_range is None:
+        return True
+    if_range = if_range.strip()
+    if if_range.startswith('"'):
+        # If-Range butuh strong comparison
+        return if_range == response_headers["etag"]
+    return if_range == response_headers["last-modified"]
+
+
+class RangeFileResponse(Response):
+    """
+    206 Partial Content untuk satu atau beberapa range (multipart/byteranges).
+    Memakai ASGI zero-copy send (sendfile) jika server mendukungnya.
+    """
+
+    def __init__(self, path: str, size: int, ranges: List[Range], headers: dict, media_type: str):
+        self.path = path
+        self.size = size
+        self.ranges = ranges
+        self.status_code = 206
+        self.background = None
+        self.media_type = None
+        self.init_headers(headers)
+
+        if len(ranges) == 1:
+            start, end = ranges[0]
+            self.parts = [(b"", start, end)]
+            self.tail = b""
+            self.headers["content-type"] = media_type
+            self.headers["content-range"] = f"bytes {start}-{end}/{size}"
+        else:
+            boundary = secrets.token_hex(16)
+            self.parts = [
+                (
+                    (b"\r\n" if i else b"")
+                    + f"--{boundary}\r\nContent-Type: {media_type}\r\n"
+                    f"Content-Range: bytes {start}-{end}/{size}\r\n\r\n".encode("latin-1"),
+                    start,
+                    end,
+                )
+                for i, (start, end) in enumerate(ranges)
+            ]
+            self.tail = f"\r\n--{boundary}--\r\n".encode("latin-1")
+            self.headers["content-type"] = f"multipart/byteranges; boundary={boundary}"
+
+        content_length = sum(len(head) + end - start + 1 for head, start, end in self.parts) + len(self.tail)
+        self.headers["content-length"] = str(content_length)
+
+    async def __call__(self, scope, receive, send) -> None:
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        if scope["method"].upper() == "HEAD":
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+
+        zerocopy = "http.response.zerocopysend" in scope.get("extensions", {})
+        async with await anyio.open_file(self.path, mode="rb") as file:
+            for head, start, end in self.parts:
+                if head:
+                    await send({"type": "http.response.body", "body": head, "more_body": True})
+                if zerocopy:
+                    await send({
+                        "type": "http.response.zerocopysend",
+                        "file": file.wrapped,
+                        "offset": start,
+                        "count": end - start + 1,
+                        "more_body": True,
+                    })
+                    continue
+                await file.seek(start)
+                remaining = end - start + 1
+                while remaining > 0:
+                    chunk = await file.read(min(CHUNK_SIZE, remaining))
+                    if not chunk:
+                        break
+                    remaining -= len(chunk)
+                    await send({"type": "http.response.body", "body": chunk, "more_body": True})
+        await send({"type": "http.response.body", "body": self.tail, "more_body": False})
+
+
+def _is_immutable(path: str) -> bool:
+    # Hanya file blob di video store ({hash}{ext}, nama = hash isi). File turunannya
+    # (poster, sprite, preview, HLS, WAV) bisa ditulis ulang di key yang sama.
+    store_dir = os.path.abspath(settings.video_store_dir)
+    path = os.path.abspath(path)
+    if not path.startswith(store_dir + os.sep):
+        return False
+    stem, ext = os.path.splitext(os.path.basename(path))
+    return ext != ".wav" and len(stem) == 64 and all(c in "0123456789abcdef" for c in stem)
+
+
+def video_file_response(request_headers: Headers, path: str, stat_result: os.stat_result) -> Response:
+    """
+    Response file video dengan Range (206 / multi-range / 416), ETag + Last-Modified,
+    If-None-Match / If-Modified-Since (304) dan If-Range.
+    """
+    cache_control = settings.video_store_cache_control if _is_immutable(path) else settings.video_cache_control
+    headers = {"accept-ranges": "bytes", "cache-control": cache_control}
+    # FileResponse dipakai untuk 200 utuh (termasuk pathsend) dan sebagai sumber ETag/Last-Modified
+    response = FileResponse(path, stat_result=stat_result, headers=headers)
+    if _is_not_modified(response.headers, request_headers):
+        return NotModifiedResponse(response.headers)
+
+    range_header = request_headers.get("range")
+    if not range_header or not _if_range_matches(request_headers.get("if-range"), response.headers):
+        return response
+
+    ranges = parse_range_header(range_header, stat_result.st_size)
+    if ranges is None:
+        return response
+    if not ranges:
+        return Response(
+            status_code=416,
+            headers={**headers, "content-range": f"bytes */{stat_result.st_size}"},
+        )
+
+    range_headers = {
+        **headers,
+        "etag": response.headers["etag"],
+        "last-modified": response.headers["last-modified"],
+    }
+    return RangeFileResponse(path, stat_result.st_size, ranges, range_headers, response.media_type)
+
+
+async def serve_video(request_headers: Headers, path: str) -> Optional[Response]:
+    """
+    Untuk endpoint video: stat di thread, None jika file tidak ada.
+    """
+    try:
+        stat_result = await anyio.to_thread.run_sync(os.stat, path)
+    except FileNotFoundError:
+        return None
+    return video_file_response(request_headers, path, stat_result)
+
+
+async def serve_stored_video(request_headers: Headers, key: str) -> Optional[Response]:
+    """
+    Video dari storage: disajikan langsung kalau lokal, selain itu redirect ke
+    URL bucket (Range / If-None-Match ditangani object storage).
+    """
+    storage = storage_backend.get_backend()
+    path = storage.local_path(key)
+    if path is None:
+        return RedirectResponse(storage.url(key), status_code=307)
+    return await serve_video(request_headers, path)
+
+
+class RangeStaticFiles(StaticFiles):
+    """
+    StaticFiles yang mendukung Range / If-Range untuk mount /videos.
+    """
+
+    def file_response(self, full_path, stat_result, scope, status_code: int = 200) -> Response:
+        if status_code != 200:
+            return super().file_response(full_path, stat_result, scope, status_code)
+        return video_file_response(Headers(scope=scope), str(full_path), stat_result)
@@ -0,0 +1,69 @@
+import os
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from werkzeug.security import generate_password_hash, check_password_hash
+from config import settings
+
+# pbkdf2/scrypt di hashlib melepas GIL, jadi thread di sini benar-benar
+# paralel. Jumlah worker = jumlah hash yang boleh jalan bersamaan.
+PASSWORD_HASH_WORKERS = settings.password_hash_workers or (os.cpu_count() or 1)
+
+_executor = None
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="passwd")
+    return _executor
+
+
+@lru_cache(maxsize=None)
+def _canonical_method(method: str) -> str:
+    # "pbkdf2:sha256" disimpan werkzeug sebagai "pbkdf2:sha256:<iterasi>", dst.
+    return generate_password_hash("", method=method).split("$", 1)[0]
+
+
+def hash_password(password: str, method: str = None) -> str:
+    return generate_password_hash(password, method=method or settings.password_hash_method)
+
+
+def verify_password(password_hash: str, password: str) -> bool:
+    return check_password_hash(password_hash, password)
+
+
+def needs_rehash(password_hash: str) -> bool:
+    """
+    True jika hash dibuat dengan algoritma / cost yang berbeda dari setting sekarang
+    """
+    return password_hash.split("$", 1)[0] != _canonical_method(settings.password_hash_method)
+
+
+def _verify_and_rehash(password_hash: str, password: str):
+    if not verify_password(password_hash, password):
+        return False, None
+    if needs_rehash(password_hash):
+        return True, hash_password(password)
+    return True, None
+
+
+async def hash_password_async(password: str, method: str = None) -> str:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_executor(), hash_password, password, method)
+
+
+async def verify_password_async(password_hash: str, password: str):
+    """
+    Verifikasi password di executor hashing.
+    Return (valid, new_hash); new_hash diisi jika hash perlu di-upgrade.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_executor(), _verify_and_rehash, password_hash, password)
+
+
+def shutdown_password_pool():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True)
+        _executor = None
@@ -1,3 +1,5 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from models.questions import Questions
 from schemas.questions import QuestionCreate
@@ -15,9 +17,11 @@ def create_question(db: Session, question_data: QuestionCreate):
     return new_question
 
 
-def get_all_questions(db: Session):
-    return db.query(Questions).all()
+async def get_all_questions(db: AsyncSession):
+    result = await db.execute(select(Questions))
+    return result.scalars().all()
 
 
-def get_question_by_id(db: Session, question_id: int):
-    return db.query(Questions).filter(Questions.id_question == question_id).first()
+async def get_question_by_id(db: AsyncSession, question_id: int):
+    result = await db.execute(select(Questions).where(Questions.id_question == question_id))
+    return result.scalars().first()
@@ -0,0 +1,78 @@
+import hashlib
+import threading
+import time
+from typing import Awaitable, Callable, Dict, Optional
+from fastapi import Request, Response
+from config import settings
+
+# Cache response JSON per proses untuk endpoint baca yang jarang berubah
+# (/jobs/, /list/lists-all). Body disimpan sudah ter-serialize beserta ETag-nya.
+JOBS_KEY = "jobs"
+LISTS_KEY = "lists"
+
+_entries: Dict[str, tuple] = {}  # key -> (expires_at, body, etag)
+_generations: Dict[str, int] = {}
+_lock = threading.Lock()
+
+
+def _make_etag(body: bytes) -> str:
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+def invalidate(*keys: str):
+    """
+    Buang cache untuk key tertentu. Dipanggil oleh mutator setelah commit.
+    """
+    with _lock:
+        for key in keys:
+            _entries.pop(key, None)
+            _generations[key] = _generations.get(key, 0) + 1
+
+
+def _get(key: str) -> Optional[tuple]:
+    with _lock:
+        entry = _entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] < time.monotonic():
+            del _entries[key]
+            return None
+        return entry[1], entry[2]
+
+
+async def get_or_build(key: str, build: Callable[[], Awaitable[bytes]]):
+    """
+    Return (body, etag). build() hanya dipanggil kalau cache kosong / kedaluwarsa.
+    """
+    cached = _get(key)
+    if cached is not None:
+        return cached
+
+    with _lock:
+        generation = _generations.get(key, 0)
+    body = await build()
+    etag = _make_etag(body)
+
+    with _lock:
+        # Jangan simpan hasil yang sudah basi karena ada invalidate() selama build
+        if settings.read_cache_ttl > 0 and _generations.get(key, 0) == generation:
+            _entries[key] = (time.monotonic() + settings.read_cache_ttl, body, etag)
+    return body, etag
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # If-None-Match memakai weak comparison (RFC 9110 13.1.2)
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+def cached_json_response(request: Request, body: bytes, etag: str) -> Response:
+    # no-cache: browser boleh simpan, tapi wajib revalidate (murah, 304)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -0,0 +1,309 @@
+import os
+import shutil
+import time
+import uuid
+import mimetypes
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Iterable, Optional
+from config import settings
+
+# Semua media (video + turunannya, gambar job) diakses lewat key relatif yang sama
+# dengan nilai di database, mis. "videos/store/answers/ab/cd/<hash>.mp4" atau
+# "static/job_images/x.png".
+# - LocalStorage: key = path di disk node ini (perilaku lama, disajikan mount /videos & /static)
+# - S3Storage: key = object key di bucket S3-compatible; client mengambil file langsung
+#   dari bucket lewat presigned URL, jadi byte video tidak lewat proses API.
+# ffmpeg / transcriber tetap butuh file lokal: pakai fetch() / get_local().
+
+SCRATCH_DIR = os.path.join(settings.video_store_dir, "tmp")
+S3_DELETE_BATCH = 1000
+
+_executor = None
+
+
+def scratch_path(ext: str = "") -> str:
+    """File sementara lokal (di filesystem yang sama dengan store lokal, jadi move atomic)."""
+    os.makedirs(SCRATCH_DIR, exist_ok=True)
+    return os.path.join(SCRATCH_DIR, uuid.uuid4().hex + ext)
+
+
+def cleanup_scratch(max_age_seconds: float):
+    """Hapus sisa file / folder scratch (proses mati di tengah upload / ffmpeg)."""
+    if not os.path.isdir(SCRATCH_DIR):
+        return
+    cutoff = time.time() - max_age_seconds
+    for entry in os.scandir(SCRATCH_DIR):
+        try:
+            if entry.stat().st_mtime >= cutoff:
+                continue
+            if entry.is_dir():
+                shutil.rmtree(entry.path, ignore_errors=True)
+            else:
+                os.remove(entry.path)
+        except OSError:
+            continue
+
+
+class StorageBackend:
+    is_local = False
+
+    def put_file(self, src_path: str, key: str):
+        """Simpan file lokal ke key. File sumber dipindah / dihapus."""
+        raise NotImplementedError
+
+    def put_fileobj(self, fileobj, key: str, content_type: str = None):
+        """Simpan stream (file-like) ke key tanpa membaca semuanya ke memori."""
+        raise NotImplementedError
+
+    def put_dir(self, src_dir: str, key_dir: str):
+        """Ganti isi folder key_dir (mis. HLS) dengan isi src_dir lokal. src_dir dihapus."""
+        raise NotImplementedError
+
+    def exists(self, key: str) -> bool:
+        raise NotImplementedError
+
+    def existing(self, keys: Iterable[str]) -> set:
+        """Subset keys yang ada."""
+        return {key for key in keys if self.exists(key)}
+
+    def download(self, key: str, dest_path: str):
+        raise NotImplementedError
+
+    def url(self, key: str) -> str:
+        """URL yang bisa diambil langsung oleh client."""
+        raise NotImplementedError
+
+    def delete(self, keys: Iterable[str]):
+        raise NotImplementedError
+
+    def delete_dir(self, key_dir: str):
+        raise NotImplementedError
+
+    def local_path(self, key: str) -> Optional[str]:
+        """Path di disk kalau key tersimpan lokal, selain itu None."""
+        return None
+
+    def get_local(self, key: str) -> str:
+        """Path lokal untuk key; di storage remote file di-download ke scratch dulu."""
+        path = self.local_path(key)
+        if path is not None:
+            return path
+        path = scratch_path(os.path.splitext(key)[1])
+        try:
+            self.download(key, path)
+        except BaseException:
+            if os.path.exists(path):
+                os.remove(path)
+            raise
+        return path
+
+    def drop_local(self, key: str, path: str):
+        """Lepas path dari get_local(): hapus kalau itu salinan download."""
+        if path != self.local_path(key) and os.path.exists(path):
+            os.remove(path)
+
+    @contextmanager
+    def fetch(self, key: str):
+        path = self.get_local(key)
+        try:
+            yield path
+        finally:
+            self.drop_local(key, path)
+
+
+class LocalStorage(StorageBackend):
+    is_local = True
+
+    def local_path(self, key: str) -> str:
+        return key
+
+    def put_file(self, src_path: str, key: str):
+        os.makedirs(os.path.dirname(key), exist_ok=True)
+        shutil.move(src_path, key)
+
+    def put_fileobj(self, fileobj, key: str, content_type: str = None):
+        os.makedirs(os.path.dirname(key), exist_ok=True)
+        tmp = f"{key}.{uuid.uuid4().hex}.part"
+        try:
+            with open(tmp, "wb") as f:
+                shutil.copyfileobj(fileobj, f)
+            os.replace(tmp, key)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+    def put_dir(self, src_dir: str, key_dir: str):
+        shutil.rmtree(key_dir, ignore_errors=True)
+        os.makedirs(os.path.dirname(key_dir), exist_ok=True)
+        shutil.move(src_dir, key_dir)
+
+    def exists(self, key: str) -> bool:
+        return os.path.exists(key)
+
+    def download(self, key: str, dest_path: str):
+        shutil.copyfile(key, dest_path)
+
+    def url(self, key: str) -> str:
+        return "/" + key
+
+    def delete(self, keys: Iterable[str]):
+        for key in keys:
+            if os.path.isfile(key):
+                os.remove(key)
+
+    def delete_dir(self, key_dir: str):
+        shutil.rmtree(key_dir, ignore_errors=True)
+
+
+class S3Storage(StorageBackend):
+    """
+    Driver S3-compatible (AWS S3, MinIO, Cloudflare R2, ...). upload_file /
+    download_file boto3 otomatis multipart dan streaming, jadi memori konstan.
+    """
+
+    def __init__(self):
+        try:
+            import boto3
+            from botocore.config import Config
+            from botocore.exceptions import ClientError
+        except ImportError:
+            raise RuntimeError("STORAGE_BACKEND=s3 membutuhkan package boto3")
+        if not settings.s3_bucket:
+            raise RuntimeError("S3_BUCKET belum diisi")
+
+        self._client_error = ClientError
+        self.bucket = settings.s3_bucket
+        self.prefix = settings.s3_prefix.strip("/")
+        self.client = boto3.client(
+            "s3",
+            endpoint_url=settings.s3_endpoint_url or None,
+            region_name=settings.s3_region,
+            aws_access_key_id=settings.s3_access_key or None,
+            aws_secret_access_key=settings.s3_secret_key or None,
+            config=Config(signature_version="s3v4", s3={"addressing_style": settings.s3_addressing_style}),
+        )
+
+    def _key(self, key: str) -> str:
+        return f"{self.prefix}/{key}" if self.prefix else key
+
+    def _unkey(self, object_key: str) -> str:
+        return object_key[len(self.prefix) + 1:] if self.prefix else object_key
+
+    @staticmethod
+    def _extra_args(key: str, content_type: str = None) -> dict:
+        content_type = content_type or mimetypes.guess_type(key)[0]
+        return {"ContentType": content_type} if content_type else {}
+
+    def _list(self, prefix: str):
+        paginator = self.client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self._key(prefix)):
+            for obj in page.get("Contents", []):
+                yield obj["Key"]
+
+    def put_file(self, src_path: str, key: str):
+        self.client.upload_file(src_path, self.bucket, self._key(key), ExtraArgs=self._extra_args(key))
+        os.remove(src_path)
+
+    def put_fileobj(self, fileobj, key: str, content_type: str = None):
+        self.client.upload_fileobj(fileobj, self.bucket, self._key(key),
+                                   ExtraArgs=self._extra_args(key, content_type))
+
+    def put_dir(self, src_dir: str, key_dir: str):
+        self.delete_dir(key_dir)
+        for root, _, files in os.walk(src_dir):
+            for name in files:
+                path = os.path.join(root, name)
+                key = "/".join([key_dir, os.path.relpath(path, src_dir).replace(os.sep, "/")])
+                self.client.upload_file(path, self.bucket, self._key(key), ExtraArgs=self._extra_args(key))
+        shutil.rmtree(src_dir, ignore_errors=True)
+
+    def exists(self, key: str) -> bool:
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self._key(key))
+            return True
+        except self._client_error as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return False
+            raise
+
+    def existing(self, keys: Iterable[str]) -> set:
+        # File turunan satu video berbagi prefix (<stem>_...), cukup satu LIST
+        keys = set(keys)
+        if not keys:
+            return set()
+        prefix = os.path.commonprefix(sorted(keys))
+        return {self._unkey(k) for k in self._list(prefix)} & keys
+
+    def download(self, key: str, dest_path: str):
+        self.client.download_file(self.bucket, self._key(key), dest_path)
+
+    def url(self, key: str) -> str:
+        if settings.storage_public_url:
+            return f"{settings.storage_public_url.rstrip('/')}/{self._key(key)}"
+        return self.client.generate_presigned_url(
+            "get_object",
+            Params={"Bucket": self.bucket, "Key": self._key(key)},
+            ExpiresIn=settings.s3_presign_expires,
+        )
+
+    def _delete_object_keys(self, object_keys):
+        object_keys = list(object_keys)
+        for i in range(0, len(object_keys), S3_DELETE_BATCH):
+            batch = object_keys[i:i + S3_DELETE_BATCH]
+            self.client.delete_objects(
+                Bucket=self.bucket,
+                Delete={"Objects": [{"Key": k} for k in batch], "Quiet": True},
+            )
+
+    def delete(self, keys: Iterable[str]):
+        self._delete_object_keys(self._key(key) for key in keys)
+
+    def delete_dir(self, key_dir: str):
+        self._delete_object_keys(self._list(key_dir.rstrip("/") + "/"))
+
+
+@lru_cache(maxsize=None)
+def get_backend() -> StorageBackend:
+    if settings.storage_backend == "s3":
+        return S3Storage()
+    if settings.storage_backend == "local":
+        return LocalStorage()
+    raise RuntimeError(f"STORAGE_BACKEND tidak dikenal: {settings.storage_backend}")
+
+
+# === Delete di background ===
+# Hapus file (apalagi di S3, satu request per batch) tidak perlu ditunggu request.
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="storage")
+    return _executor
+
+
+def _delete(keys, dirs):
+    storage = get_backend()
+    try:
+        if keys:
+            storage.delete(keys)
+        for key_dir in dirs:
+            storage.delete_dir(key_dir)
+    except Exception as e:
+        print(f"Failed to delete {keys + dirs}: {e}")
+
+
+def submit(fn, *args):
+    return _get_executor().submit(fn, *args)
+
+
+def delete_later(keys: Iterable[str] = (), dirs: Iterable[str] = ()):
+    return submit(_delete, list(keys), list(dirs))
+
+
+def shutdown_storage_pool():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True)
+        _executor = None
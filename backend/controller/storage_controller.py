@@ -0,0 +1,120 @@
+import os
+import hashlib
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from config import settings
+from database import BackgroundSessionLocal
+from models.video_blob import VideoBlob
+from controller import transcode_controller, storage_backend
+
+# Storage video content-addressed:
+#   {VIDEO_STORE_DIR}/{kind}/{hash[:2]}/{hash[2:4]}/{hash}{ext}
+# kind "hr" = video pertanyaan apa adanya, "answers" = hasil transcode jawaban
+# (hash dari file upload, jadi upload yang identik tidak di-transcode ulang).
+# Isi file di sebuah path tidak pernah berubah, jadi aman di-cache lama.
+# Path di sini adalah key storage (lihat storage_backend), bisa lokal atau di S3.
+STORE_DIR = settings.video_store_dir
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def new_temp_path(ext: str = "") -> str:
+    """File upload sementara (selalu lokal, dipindah ke storage oleh store_file)."""
+    return storage_backend.scratch_path(ext)
+
+
+def hashed_path(kind: str, content_hash: str, ext: str) -> str:
+    return "/".join([STORE_DIR, kind, content_hash[:2], content_hash[2:4], content_hash + ext.lower()])
+
+
+def is_stored_path(path: str) -> bool:
+    return path.replace("\\", "/").startswith(STORE_DIR.rstrip("/") + "/")
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(HASH_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def acquire(db: Session, kind: str, content_hash: str, ext: str, size: int = None) -> str:
+    """
+    Tambah satu referensi ke blob (buat kalau belum ada). Tidak commit: dipanggil
+    dalam transaksi yang sama dengan insert Answer / Questions yang memakainya.
+    Return path blob.
+    """
+    path = hashed_path(kind, content_hash, ext)
+    for _ in range(2):
+        blob = db.query(VideoBlob).filter(VideoBlob.path == path).with_for_update().first()
+        if blob:
+            blob.ref_count += 1
+            return path
+        try:
+            with db.begin_nested():
+                db.add(VideoBlob(path=path, content_hash=content_hash, size=size, ref_count=1))
+            return path
+        except IntegrityError:
+            # Request lain membuat blob yang sama barusan, ulangi sebagai increment
+            continue
+    raise RuntimeError(f"Gagal mendaftarkan blob {path}")
+
+
+def is_stored(path: str) -> bool:
+    return storage_backend.get_backend().exists(path)
+
+
+def store_file(temp_path: str, path: str) -> bool:
+    """
+    Pindahkan file upload ke path blob; kalau isinya sudah ada, buang yang baru.
+    Return True kalau file baru disimpan.
+    """
+    storage = storage_backend.get_backend()
+    if storage.exists(path):
+        os.remove(temp_path)
+        return False
+    storage.put_file(temp_path, path)
+    return True
+
+
+def release(db: Session, path: str) -> bool:
+    """
+    Kurangi satu referensi. Tidak commit. Return True kalau file boleh dihapus
+    setelah commit (referensi terakhir, atau file lama di luar store).
+    """
+    if not path:
+        return False
+    blob = db.query(VideoBlob).filter(VideoBlob.path == path).with_for_update().first()
+    if blob is None:
+        return not is_stored_path(path)
+    blob.ref_count -= 1
+    if blob.ref_count > 0:
+        return False
+    db.delete(blob)
+    return True
+
+
+def _remove_unreferenced(path: str):
+    # Jalan di background: kalau sementara itu video yang sama di-upload lagi
+    # (blob dibuat ulang), file dibiarkan
+    if is_stored_path(path):
+        db = BackgroundSessionLocal()
+        try:
+            if db.query(VideoBlob.path).filter(VideoBlob.path == path).first():
+                return
+        finally:
+            db.close()
+
+    hls_dir = transcode_controller.hls_dir_for(path)
+    files = [path] + [p for p in transcode_controller.derived_paths(path) if p != hls_dir]
+    storage = storage_backend.get_backend()
+    try:
+        storage.delete(files)
+        storage.delete_dir(hls_dir)
+    except Exception as e:
+        print(f"Failed to delete video files for {path}: {e}")
+
+
+def remove_video_files(path: str):
+    """Hapus (di background) file video beserta semua turunannya (WAV, rendition, thumbnail)."""
+    storage_backend.submit(_remove_unreferenced, path)
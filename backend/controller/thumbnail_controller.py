@@ -0,0 +1,151 @@
+import os
+import json
+import math
+import subprocess
+from config import settings
+from controller import storage_backend
+
+# Poster + sprite sheet (seek preview) per video, disimpan di samping file video:
+#   <stem>_poster.jpg / <stem>_poster.webp, <stem>_sprite.jpg + <stem>_sprite.vtt
+# VTT berisi cue "<sprite>#xywh=x,y,w,h" per interval, format thumbnail track yang
+# dipakai player (video.js, Plyr, dll).
+
+
+def poster_path_for(video_path: str, ext: str = "jpg") -> str:
+    return os.path.splitext(video_path)[0] + f"_poster.{ext}"
+
+
+def sprite_path_for(video_path: str) -> str:
+    return os.path.splitext(video_path)[0] + "_sprite.jpg"
+
+
+def sprite_vtt_path_for(video_path: str) -> str:
+    return os.path.splitext(video_path)[0] + "_sprite.vtt"
+
+
+def thumbnail_paths(video_path: str):
+    return {
+        "poster_url": poster_path_for(video_path),
+        "poster_webp_url": poster_path_for(video_path, "webp"),
+        "sprite_url": sprite_path_for(video_path),
+        "sprite_vtt_url": sprite_vtt_path_for(video_path),
+    }
+
+
+def probe_video_info(path: str):
+    """Return (duration_detik, width, height) dari ffprobe, None kalau tidak ada stream video."""
+    try:
+        out = subprocess.run(
+            ["ffprobe", "-v", "error", "-select_streams", "v:0",
+             "-show_entries", "format=duration:stream=width,height", "-of", "json", path],
+            check=True, capture_output=True, text=True
+        )
+        info = json.loads(out.stdout)
+        stream = info["streams"][0]
+        return float(info["format"]["duration"]), int(stream["width"]), int(stream["height"])
+    except (subprocess.CalledProcessError, ValueError, KeyError, IndexError):
+        return None
+
+
+def sprite_layout(duration: float, width: int, height: int):
+    """
+    Return (frames, columns, rows, tile_width, tile_height) untuk sprite sheet.
+    Tinggi tile dihitung di sini (genap) supaya koordinat di VTT pasti cocok.
+    """
+    interval = settings.sprite_interval_seconds
+    frames = max(1, math.ceil(duration / interval))
+    columns = min(settings.sprite_columns, frames)
+    rows = math.ceil(frames / columns)
+    tile_width = settings.sprite_tile_width
+    tile_height = max(2, round(tile_width * height / width / 2) * 2)
+    return frames, columns, rows, tile_width, tile_height
+
+
+def _vtt_timestamp(seconds: float) -> str:
+    hours, rest = divmod(seconds, 3600)
+    minutes, secs = divmod(rest, 60)
+    return f"{int(hours):02d}:{int(minutes):02d}:{secs:06.3f}"
+
+
+def build_sprite_vtt(sprite_name: str, duration: float, layout) -> str:
+    frames, columns, _, tile_width, tile_height = layout
+    interval = settings.sprite_interval_seconds
+    lines = ["WEBVTT", ""]
+    for i in range(frames):
+        start = i * interval
+        end = min((i + 1) * interval, duration)
+        x = (i % columns) * tile_width
+        y = (i // columns) * tile_height
+        lines += [
+            f"{_vtt_timestamp(start)} --> {_vtt_timestamp(end)}",
+            f"{sprite_name}#xywh={x},{y},{tile_width},{tile_height}",
+            "",
+        ]
+    return "\n".join(lines)
+
+
+def build_thumbnail_command(src: str, duration: float, layout, poster_jpg: str, poster_webp: str, sprite: str):
+    """
+    Satu invocation ffmpeg (decode sekali): poster dari detik ke-N + sprite sheet
+    dari satu frame per SPRITE_INTERVAL_SECONDS.
+    """
+    _, columns, rows, tile_width, tile_height = layout
+    poster_at = min(settings.poster_offset_seconds, duration / 2)
+    poster = f"[p]trim=start={poster_at:.3f},setpts=PTS-STARTPTS,scale={settings.poster_width}:-2"
+    poster += ",split=2[pj][pw]" if poster_webp else "[pj]"
+    sprite_chain = (
+        f"[s]fps=1/{settings.sprite_interval_seconds},"
+        f"scale={tile_width}:{tile_height},tile={columns}x{rows}[sp]"
+    )
+    graph = f"[0:v]split=2[p][s];{poster};{sprite_chain}"
+
+    cmd = ["ffmpeg", "-y", "-i", src, "-filter_complex", graph]
+    cmd += ["-map", "[pj]", "-frames:v", "1", "-update", "1", "-q:v", "3", poster_jpg]
+    if poster_webp:
+        cmd += ["-map", "[pw]", "-frames:v", "1", "-update", "1", "-c:v", "libwebp", "-quality", "75", poster_webp]
+    cmd += ["-map", "[sp]", "-frames:v", "1", "-update", "1", "-q:v", "5", sprite]
+    return cmd
+
+
+def generate_thumbnails(video_path: str, src: str = None):
+    """
+    Buat poster + sprite untuk sebuah video. Kegagalan hanya di-log,
+    video tetap bisa diputar tanpa thumbnail.
+    src = salinan lokal video (default video_path, untuk storage lokal).
+    Return key (lihat thumbnail_paths) file yang berhasil disimpan.
+    """
+    if not settings.thumbnails_enabled:
+        return []
+
+    src = src or video_path
+    info = probe_video_info(src)
+    if info is None:
+        print(f"Failed to generate thumbnails for {video_path}: no video stream")
+        return []
+    duration, width, height = info
+    layout = sprite_layout(duration, width, height)
+
+    final = thumbnail_paths(video_path)
+    if not settings.thumbnail_webp:
+        del final["poster_webp_url"]
+    # Nama sementara unik: video yang sama bisa diproses dua worker sekaligus (dedup)
+    tmp = {key: storage_backend.scratch_path(os.path.splitext(path)[1]) for key, path in final.items()}
+
+    storage = storage_backend.get_backend()
+    try:
+        subprocess.run(
+            build_thumbnail_command(src, duration, layout, tmp["poster_url"],
+                                    tmp.get("poster_webp_url"), tmp["sprite_url"]),
+            check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        with open(tmp["sprite_vtt_url"], "w", encoding="utf-8") as f:
+            f.write(build_sprite_vtt(os.path.basename(final["sprite_url"]), duration, layout))
+        for key, path in tmp.items():
+            storage.put_file(path, final[key])
+    except Exception as e:
+        print(f"Failed to generate thumbnails for {video_path}: {e}")
+        for path in tmp.values():
+            if os.path.exists(path):
+                os.remove(path)
+        return []
+    return list(final)
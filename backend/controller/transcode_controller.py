@@ -0,0 +1,417 @@
+import os
+import glob
+import json
+import time
+import uuid
+import asyncio
+import mimetypes
+import shutil
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from config import settings
+from database import BackgroundSessionLocal
+from models.answer import Answer, AnswerStatus
+from models.video_blob import VideoBlob
+from controller import thumbnail_controller, storage_backend
+
+# ffmpeg sudah jalan di prosesnya sendiri, jadi thread di sini cuma menunggu
+# subprocess selesai. Jumlah worker = jumlah encode paralel maksimum.
+TRANSCODE_WORKERS = settings.transcode_workers or max(1, (os.cpu_count() or 2) // 2)
+# Bagi core ke tiap encode supaya x264 tidak oversubscribe CPU
+THREADS_PER_ENCODE = max(1, (os.cpu_count() or 1) // TRANSCODE_WORKERS)
+
+# Codec yang bisa langsung diputar browser di dalam container mp4
+BROWSER_VIDEO_CODECS = {"h264"}
+BROWSER_AUDIO_CODECS = {"aac"}
+
+# Segmen HLS (.ts) tidak dikenali / salah ditebak oleh mimetypes bawaan
+mimetypes.add_type("video/mp2t", ".ts")
+mimetypes.add_type("application/vnd.apple.mpegurl", ".m3u8")
+
+# Source upload menunggu transcode: <stem video_url>.<uuid>.src. Disimpan di luar
+# folder yang di-mount dan baru dihapus setelah transcode selesai, jadi jawaban
+# yang masih processing saat proses mati bisa di-transcode ulang saat startup.
+PENDING_DIR = settings.transcode_pending_dir
+
+_executor = None
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=TRANSCODE_WORKERS, thread_name_prefix="transcode")
+    return _executor
+
+
+def probe_codecs(path: str):
+    """Return (video_codec, audio_codec) dari ffprobe, None kalau stream tidak ada."""
+    try:
+        out = subprocess.run(
+            ["ffprobe", "-v", "error", "-show_entries", "stream=codec_type,codec_name", "-of", "json", path],
+            check=True, capture_output=True, text=True
+        )
+        streams = json.loads(out.stdout).get("streams", [])
+    except (subprocess.CalledProcessError, ValueError):
+        return None, None
+
+    video = next((s["codec_name"] for s in streams if s.get("codec_type") == "video"), None)
+    audio = next((s["codec_name"] for s in streams if s.get("codec_type") == "audio"), None)
+    return video, audio
+
+
+def audio_path_for(video_path: str) -> str:
+    """Lokasi track audio WAV 16kHz mono (input transcriber) untuk sebuah video."""
+    return os.path.splitext(video_path)[0] + ".wav"
+
+
+def preview_path_for(video_path: str) -> str:
+    """Rendition MP4 bitrate rendah untuk koneksi lemah."""
+    return os.path.splitext(video_path)[0] + "_preview.mp4"
+
+
+def hls_dir_for(video_path: str) -> str:
+    """Folder HLS: master.m3u8, playlist v0 (asli) / v1 (ringan) dan segmennya."""
+    return os.path.splitext(video_path)[0] + "_hls"
+
+
+def rendition_paths(video_path: str) -> dict:
+    return {
+        "preview_url": preview_path_for(video_path),
+        "hls_url": os.path.join(hls_dir_for(video_path), "master.m3u8").replace("\\", "/"),
+    }
+
+
+def _media_paths(video_path: str) -> dict:
+    return {**rendition_paths(video_path), **thumbnail_controller.thumbnail_paths(video_path)}
+
+
+def media_urls(video_path: str) -> dict:
+    """
+    Semua file turunan (rendition + poster/sprite, format sama dengan video_url)
+    yang sudah ada untuk sebuah video, dicek langsung ke storage.
+    """
+    paths = _media_paths(video_path)
+    existing = storage_backend.get_backend().existing(paths.values())
+    return {key: path for key, path in paths.items() if path in existing}
+
+
+async def media_urls_many(video_paths, db: AsyncSession) -> dict:
+    """
+    media_urls untuk banyak video sekaligus. Diambil dari video_blobs.derived_media
+    (satu query per 1000 video); storage hanya dicek untuk video yang belum
+    tercatat (path lama di luar video store, blob sebelum backfill).
+    """
+    unique = list(set(filter(None, video_paths)))
+    urls = {}
+    for i in range(0, len(unique), 1000):
+        result = await db.execute(
+            select(VideoBlob.path, VideoBlob.derived_media)
+            .where(VideoBlob.path.in_(unique[i:i + 1000]), VideoBlob.derived_media.isnot(None))
+        )
+        for path, derived_media in result.all():
+            paths = _media_paths(path)
+            urls[path] = {key: paths[key] for key in json.loads(derived_media) if key in paths}
+
+    unrecorded = [path for path in unique if path not in urls]
+    if unrecorded:
+        # Storage remote = request jaringan, jalankan di thread
+        urls.update(await asyncio.to_thread(lambda: {path: media_urls(path) for path in unrecorded}))
+    return urls
+
+
+def record_derived_media(video_path: str, keys):
+    """Catat media turunan yang sudah dibuat di blob video (digabung dengan yang lama)."""
+    db = BackgroundSessionLocal()
+    try:
+        blob = db.query(VideoBlob).filter(VideoBlob.path == video_path).with_for_update().first()
+        if blob is None:
+            # Path lama di luar video store: URL tetap dicek ke storage
+            return
+        recorded = set(json.loads(blob.derived_media)) if blob.derived_media else set()
+        blob.derived_media = json.dumps(sorted(recorded | set(keys)))
+        db.commit()
+    finally:
+        db.close()
+
+
+def derived_paths(video_path: str) -> list:
+    """File / folder turunan sebuah video: WAV transcriber, rendition, poster/sprite."""
+    return [
+        audio_path_for(video_path),
+        preview_path_for(video_path),
+        hls_dir_for(video_path),
+    ] + list(thumbnail_controller.thumbnail_paths(video_path).values())
+
+
+def build_transcode_command(src: str, dst: str, audio_dst: str = None):
+    """
+    Command ffmpeg webm -> mp4. Stream yang codec-nya sudah kompatibel browser
+    cukup di-copy (remux), sisanya di-encode dengan preset/CRF dari config.
+    Kalau audio_dst diisi, di invocation yang sama ditulis juga WAV 16kHz mono
+    untuk transcriber, jadi audio cukup di-decode sekali.
+    """
+    video_codec, audio_codec = probe_codecs(src)
+
+    cmd = ["ffmpeg", "-y", "-i", src]
+    if video_codec in BROWSER_VIDEO_CODECS:
+        cmd += ["-c:v", "copy"]
+    else:
+        cmd += [
+            "-c:v", "libx264",
+            "-preset", settings.transcode_preset,
+            "-crf", str(settings.transcode_crf),
+            "-threads", str(THREADS_PER_ENCODE),
+        ] + _keyframe_args()
+    if audio_codec in BROWSER_AUDIO_CODECS:
+        cmd += ["-c:a", "copy"]
+    else:
+        cmd += ["-c:a", "aac"]
+    # moov atom di depan file: browser bisa mulai play tanpa mengambil ekor file dulu
+    cmd += ["-movflags", "+faststart", dst]
+
+    if audio_dst and audio_codec:
+        cmd += ["-map", "0:a:0", "-vn", "-acodec", "pcm_s16le", "-ar", "16000", "-ac", "1", audio_dst]
+    return cmd
+
+
+def _keyframe_args(index: str = ""):
+    # Keyframe tiap HLS_SEGMENT_SECONDS, supaya segmen HLS (v0 copy dari MP4 ini
+    # dan v1) terpotong di durasi itu dan batasnya sama di kedua variant
+    return [f"-force_key_frames:v{index}", f"expr:gte(t,n_forced*{settings.hls_segment_seconds})"]
+
+
+def _preview_encode_args(has_audio: bool, index: str = ""):
+    args = [
+        f"-c:v{index}", "libx264",
+        f"-b:v{index}", settings.preview_video_bitrate,
+        f"-maxrate:v{index}", settings.preview_video_bitrate,
+        f"-bufsize:v{index}", settings.preview_video_bitrate,
+        f"-filter:v{index}", f"scale=-2:{settings.preview_height}",
+    ]
+    if has_audio:
+        args += [f"-c:a{index}", "aac", f"-b:a{index}", settings.preview_audio_bitrate]
+    return args
+
+
+def build_rendition_command(src: str, preview_dst: str = None, hls_dst_dir: str = None):
+    """
+    Satu invocation ffmpeg (decode sekali) untuk rendition tambahan dari MP4 final:
+    - preview_dst: MP4 faststart resolusi/bitrate rendah
+    - hls_dst_dir: HLS VOD dengan dua variant, asli (v0, copy) dan ringan (v1), plus master.m3u8
+    """
+    _, audio_codec = probe_codecs(src)
+    has_audio = audio_codec is not None
+    maps = ["-map", "0:v:0"] + (["-map", "0:a:0"] if has_audio else [])
+    x264 = ["-preset", settings.transcode_preset, "-threads", str(THREADS_PER_ENCODE)]
+
+    cmd = ["ffmpeg", "-y", "-i", src]
+    if preview_dst:
+        cmd += maps + _preview_encode_args(has_audio) + x264 + ["-movflags", "+faststart", preview_dst]
+
+    if hls_dst_dir:
+        cmd += maps + maps
+        cmd += ["-c:v:0", "copy"] + (["-c:a:0", "copy"] if has_audio else [])
+        cmd += _preview_encode_args(has_audio, ":1") + _keyframe_args(":1") + x264
+        # Semua file di satu folder: master.m3u8 ditulis di folder output playlist
+        cmd += [
+            "-f", "hls",
+            "-hls_time", str(settings.hls_segment_seconds),
+            "-hls_playlist_type", "vod",
+            "-hls_segment_filename", os.path.join(hls_dst_dir, "v%v_%05d.ts"),
+            "-master_pl_name", "master.m3u8",
+            "-var_stream_map", "v:0,a:0 v:1,a:1" if has_audio else "v:0 v:1",
+            os.path.join(hls_dst_dir, "v%v.m3u8"),
+        ]
+    return cmd
+
+
+def build_answer_renditions(video_path: str, src: str = None):
+    """
+    Buat rendition preview / HLS sesuai config. Dipanggil setelah video utama ready,
+    jadi kegagalan di sini tidak membuat jawaban gagal.
+    src = salinan lokal video (default video_path, untuk storage lokal).
+    Return key (lihat rendition_paths) rendition yang berhasil disimpan.
+    """
+    if not (settings.transcode_preview or settings.transcode_hls):
+        return []
+
+    storage = storage_backend.get_backend()
+    # Nama sementara unik: video yang sama bisa diproses dua worker sekaligus (dedup)
+    tmp_preview = storage_backend.scratch_path(".mp4") if settings.transcode_preview else None
+    tmp_hls_dir = storage_backend.scratch_path() if settings.transcode_hls else None
+    try:
+        if tmp_hls_dir:
+            os.makedirs(tmp_hls_dir)
+        subprocess.run(build_rendition_command(src or video_path, tmp_preview, tmp_hls_dir), check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        built = []
+        if tmp_preview:
+            storage.put_file(tmp_preview, preview_path_for(video_path))
+            built.append("preview_url")
+        if tmp_hls_dir:
+            storage.put_dir(tmp_hls_dir, hls_dir_for(video_path))
+            built.append("hls_url")
+        return built
+    except Exception as e:
+        print(f"Failed to build renditions for {video_path}: {e}")
+        if tmp_preview and os.path.exists(tmp_preview):
+            os.remove(tmp_preview)
+        if tmp_hls_dir:
+            shutil.rmtree(tmp_hls_dir, ignore_errors=True)
+        return []
+
+
+def _set_answers_status(video_url: str, status: str):
+    # Semua jawaban yang menunggu file ini (upload identik berbagi satu file)
+    db = BackgroundSessionLocal()
+    try:
+        db.query(Answer).filter(
+            Answer.video_url == video_url,
+            Answer.status == AnswerStatus.processing.value
+        ).update({"status": status}, synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+
+def _is_referenced(video_url: str) -> bool:
+    # Blob (video store) atau jawaban (path lama) yang masih memakai file ini
+    db = BackgroundSessionLocal()
+    try:
+        return (
+            db.query(VideoBlob.path).filter(VideoBlob.path == video_url).first() is not None
+            or db.query(Answer.id).filter(Answer.video_url == video_url).first() is not None
+        )
+    finally:
+        db.close()
+
+
+def transcode_answer_video(answer_id: int, src: str, dst: str):
+    if not os.path.exists(src):
+        # Source sudah diambil alih proses lain (recovery saat startup)
+        return
+    # Tulis ke file sementara lalu simpan ke storage, jadi file di video_url tidak pernah setengah jadi
+    storage = storage_backend.get_backend()
+    tmp_dst = storage_backend.scratch_path(".mp4")
+    tmp_audio_dst = storage_backend.scratch_path(".wav")
+    try:
+        subprocess.run(build_transcode_command(src, tmp_dst, tmp_audio_dst), check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        storage.put_file(tmp_dst, dst)
+        if os.path.exists(tmp_audio_dst):
+            storage.put_file(tmp_audio_dst, audio_path_for(dst))
+        if not _is_referenced(dst):
+            # Jawaban dihapus selama transcode: penghapusan file sudah jalan
+            # sebelum output ada, jadi output ini yatim
+            storage.delete([dst, audio_path_for(dst)])
+            return
+        _set_answers_status(dst, AnswerStatus.ready.value)
+    except Exception as e:
+        print(f"Failed to transcode answer {answer_id}: {e}")
+        for path in (tmp_dst, tmp_audio_dst):
+            if os.path.exists(path):
+                os.remove(path)
+        _set_answers_status(dst, AnswerStatus.failed.value)
+        return
+    finally:
+        if os.path.exists(src):
+            os.remove(src)
+
+    build_derived_media(dst, renditions=True)
+
+
+def build_derived_media(video_path: str, renditions: bool):
+    """Thumbnail (+ rendition) sebuah video, lalu dicatat di blob-nya untuk media_urls_many."""
+    # Storage remote: video di-download sekali untuk thumbnail + rendition
+    try:
+        with storage_backend.get_backend().fetch(video_path) as src:
+            built = thumbnail_controller.generate_thumbnails(video_path, src)
+            if renditions:
+                built += build_answer_renditions(video_path, src)
+        record_derived_media(video_path, built)
+    except Exception as e:
+        print(f"Failed to build derived media for {video_path}: {e}")
+
+
+def _pending_source_path(video_path: str) -> str:
+    stem = os.path.basename(os.path.splitext(video_path)[0])
+    return os.path.join(PENDING_DIR, f"{stem}.{uuid.uuid4().hex}.src")
+
+
+def _pending_sources(video_path: str) -> list:
+    stem = os.path.basename(os.path.splitext(video_path)[0])
+    return sorted(glob.glob(os.path.join(glob.escape(PENDING_DIR), glob.escape(stem) + ".*.src")))
+
+
+def submit_answer_transcode(answer_id: int, src: str, dst: str):
+    os.makedirs(PENDING_DIR, exist_ok=True)
+    pending = _pending_source_path(dst)
+    shutil.move(src, pending)
+    return _get_executor().submit(transcode_answer_video, answer_id, pending, dst)
+
+
+def recover_pending_transcodes():
+    """
+    Dipanggil saat startup. Jawaban yang masih processing di-transcode ulang
+    dari source di PENDING_DIR; kalau source hilang, ready jika MP4-nya sudah
+    tersimpan, selain itu failed. Sisa scratch / source yatim ikut dibersihkan.
+    """
+    max_age = settings.scratch_ttl_hours * 3600
+    storage_backend.cleanup_scratch(max_age)
+
+    db = BackgroundSessionLocal()
+    try:
+        processing = (
+            db.query(Answer.video_url, func.min(Answer.id))
+            .filter(Answer.status == AnswerStatus.processing.value)
+            .group_by(Answer.video_url)
+            .all()
+        )
+    finally:
+        db.close()
+
+    claimed = set()
+    for video_url, answer_id in processing:
+        src = None
+        for source in _pending_sources(video_url):
+            if src is None:
+                # Rename atomic: kalau beberapa proses start bersamaan, satu yang menang
+                candidate = _pending_source_path(video_url)
+                try:
+                    os.rename(source, candidate)
+                    src = candidate
+                except OSError:
+                    continue
+            else:
+                # Upload identik yang di-submit dobel, cukup satu
+                os.remove(source)
+        if src:
+            claimed.add(src)
+            _get_executor().submit(transcode_answer_video, answer_id, src, video_url)
+        elif storage_backend.get_backend().exists(video_url):
+            _set_answers_status(video_url, AnswerStatus.ready.value)
+        else:
+            _set_answers_status(video_url, AnswerStatus.failed.value)
+
+    # Source tanpa jawaban processing (mis. jawabannya sudah dihapus)
+    cutoff = time.time() - max_age
+    for source in glob.glob(os.path.join(glob.escape(PENDING_DIR), "*.src")):
+        try:
+            if source not in claimed and os.path.getmtime(source) < cutoff:
+                os.remove(source)
+        except OSError:
+            continue
+
+
+def submit_thumbnails(video_path: str):
+    """Poster + sprite untuk video yang tidak lewat transcode (video pertanyaan HR)."""
+    return _get_executor().submit(build_derived_media, video_path, False)
+
+
+def shutdown_transcode_pool():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True)
+        _executor = None
@@ -1,36 +1,250 @@
 from sqlalchemy.orm import Session
-from models.answer import Answer
+from sqlalchemy import or_, and_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import func
+from datetime import datetime, timedelta, timezone
+from config import settings
+from database import BackgroundSessionLocal
+from models.answer import Answer, AnswerStatus
+from models.transcription_job import TranscriptionJob, TranscriptionStatus
 from transcript import model as transcript_model
+from controller.transcode_controller import audio_path_for
+from controller import storage_backend
+import asyncio
+import json
 import os
-import ffmpeg
 
-async def transcribe_video(answer_id: int, db: Session):
-    print(f"Entering transcribe_video for answer_id: {answer_id}")
-    answer = db.query(Answer).filter(Answer.id == answer_id).first()
-    print(f"Answer found: {answer}")
-    if not answer:
-        print(f"Answer with ID {answer_id} not found.")
-        return None
+ACTIVE_STATUSES = [TranscriptionStatus.queued.value, TranscriptionStatus.running.value]
+
+# Worker yang sedang jalan di proses ini + event untuk membangunkan worker
+# saat ada job baru (supaya tidak menunggu poll interval).
+_worker_tasks = []
+_wakeup = asyncio.Event()
+# Loop tempat worker jalan; enqueue bisa dipanggil dari thread lain (endpoint sync)
+_worker_loop = None
 
-    video_path = answer.video_url
-    print(f"Video path: {video_path}, exists: {os.path.exists(video_path)}")
-    if not os.path.exists(video_path):
+async def transcribe_video(answer_id: int, video_path: str, partial=None):
+    # Tidak memegang session DB: panggilan model bisa bermenit-menit
+    print(f"Entering transcribe_video for answer_id: {answer_id}")
+    storage = storage_backend.get_backend()
+    audio_key = audio_path_for(video_path)
+    existing = await asyncio.to_thread(storage.existing, [video_path, audio_key])
+    print(f"Video path: {video_path}, exists: {video_path in existing}")
+    if video_path not in existing:
         print(f"Video file not found at path: {video_path}")
         return {"error": "Video file not found."}
 
-    audio_path = os.path.splitext(video_path)[0] + ".mp3"
-    try:
-        ffmpeg.input(video_path).output(audio_path, acodec='mp3').run(overwrite_output=True)
-    except Exception as e:
-        print(f"FFmpeg error: {str(e)}")
-        return {"error": f"Failed to extract audio: {str(e)}"}
+    # WAV 16kHz ditulis sekali saat ingest (lihat transcode_controller).
+    # Answer lama yang belum punya artefak itu diekstrak sekali lalu disimpan.
+    if audio_key not in existing:
+        try:
+            await asyncio.to_thread(_extract_and_store_audio, storage, video_path, audio_key)
+        except Exception as e:
+            print(f"FFmpeg error: {str(e)}")
+            return {"error": f"Failed to extract audio: {str(e)}"}
 
-    transcript_result = await transcript_model.get_transcript_from_audio(audio_path)
+    # Storage remote: WAV di-download ke scratch selama transcribe
+    audio_path = await asyncio.to_thread(storage.get_local, audio_key)
+    try:
+        transcript_result = await transcript_model.transcribe_wav(audio_path, partial)
+    finally:
+        storage.drop_local(audio_key, audio_path)
     print(f"Transcript result from model: {transcript_result}")
 
-    answer.transcript = transcript_result.get("text", "")
+    if transcript_result.get("status") == "error":
+        return {"error": transcript_result.get("reason", "Transcription failed"), "partial": transcript_result.get("partial")}
+
+    return {
+        "answer_id": answer_id,
+        "transcript": transcript_result.get("text", ""),
+        "segments": transcript_result.get("segments", [])
+    }
+
+
+def _extract_and_store_audio(storage, video_path: str, audio_key: str):
+    tmp_audio = storage_backend.scratch_path(".wav")
+    try:
+        with storage.fetch(video_path) as src:
+            transcript_model.extract_audio_from_video(src, tmp_audio)
+        storage.put_file(tmp_audio, audio_key)
+    finally:
+        if os.path.exists(tmp_audio):
+            os.remove(tmp_audio)
+
+
+def enqueue_transcription(answer_id: int, db: Session):
+    answer = db.query(Answer.id, Answer.status).filter(Answer.id == answer_id).first()
+    if not answer:
+        return None, "Answer not found"
+    if answer.status != AnswerStatus.ready.value:
+        return None, f"Video is not ready ({answer.status})"
+
+    # Jangan buat job dobel kalau answer ini masih di-queue / sedang diproses
+    active_job = db.query(TranscriptionJob).filter(
+        TranscriptionJob.answer_id == answer_id,
+        TranscriptionJob.status.in_(ACTIVE_STATUSES)
+    ).first()
+    if active_job:
+        return active_job, None
+
+    job = TranscriptionJob(answer_id=answer_id, status=TranscriptionStatus.queued.value)
+    db.add(job)
     db.commit()
+    db.refresh(job)
+
+    _wake_workers()
+    return job, None
+
+
+def _wake_workers():
+    # asyncio.Event tidak thread-safe: set() harus jalan di loop milik worker
+    if _worker_loop is not None and not _worker_loop.is_closed():
+        _worker_loop.call_soon_threadsafe(_wakeup.set)
+
+
+async def get_transcription_job(job_id: int, db: AsyncSession):
+    result = await db.execute(select(TranscriptionJob).where(TranscriptionJob.id == job_id))
+    return result.scalars().first()
+
+
+def _claim_next_job():
+    """
+    Ambil satu job queued (atau running yang sudah stale) dan tandai running.
+    FOR UPDATE SKIP LOCKED supaya worker di proses lain tidak mengambil job yang sama.
+    """
+    db = BackgroundSessionLocal()
+    try:
+        stale_before = datetime.now(timezone.utc) - timedelta(minutes=settings.transcription_stale_minutes)
+        job = (
+            db.query(TranscriptionJob)
+            .filter(or_(
+                TranscriptionJob.status == TranscriptionStatus.queued.value,
+                and_(
+                    TranscriptionJob.status == TranscriptionStatus.running.value,
+                    TranscriptionJob.started_at < stale_before
+                )
+            ))
+            .order_by(TranscriptionJob.id)
+            .with_for_update(skip_locked=True)
+            .first()
+        )
+        if not job:
+            db.rollback()
+            return None
+
+        if job.attempts >= settings.transcription_max_attempts:
+            job.status = TranscriptionStatus.failed.value
+            job.error = job.error or "Exceeded max attempts"
+            job.finished_at = func.now()
+            db.commit()
+            return job.id, None
+
+        job.status = TranscriptionStatus.running.value
+        job.attempts += 1
+        job.started_at = func.now()
+        db.commit()
+        return job.id, job.answer_id
+    finally:
+        db.close()
+
+
+def _load_partial_result(db: Session, answer_id: int):
+    # Hasil segmen dari job sebelumnya untuk answer ini (job yang sama kalau di-queue ulang)
+    row = (
+        db.query(TranscriptionJob.partial_result)
+        .filter(TranscriptionJob.answer_id == answer_id, TranscriptionJob.partial_result.isnot(None))
+        .order_by(TranscriptionJob.id.desc())
+        .first()
+    )
+    return json.loads(row.partial_result) if row else None
+
+
+def _load_job_input(answer_id: int):
+    """(video_url, hasil segmen sebelumnya) untuk answer, None kalau answer tidak ada."""
+    db = BackgroundSessionLocal()
+    try:
+        answer = db.query(Answer.video_url).filter(Answer.id == answer_id).first()
+        if not answer:
+            print(f"Answer with ID {answer_id} not found.")
+            return None
+        return answer.video_url, _load_partial_result(db, answer_id)
+    finally:
+        db.close()
+
+
+def _save_job_result(job_id: int, answer_id: int, result):
+    db = BackgroundSessionLocal()
+    try:
+        job = db.query(TranscriptionJob).filter(TranscriptionJob.id == job_id).first()
+        if not job:
+            return
+        if not result or "error" in result:
+            job.status = TranscriptionStatus.failed.value
+            job.error = result["error"] if result else "Answer not found"
+            if result and result.get("partial"):
+                job.partial_result = json.dumps(result["partial"])
+        else:
+            db.query(Answer).filter(Answer.id == answer_id).update({
+                "transcript": result["transcript"],
+                "transcript_segments": json.dumps(result["segments"])
+            }, synchronize_session=False)
+            job.status = TranscriptionStatus.done.value
+            job.error = None
+            db.query(TranscriptionJob).filter(
+                TranscriptionJob.answer_id == answer_id,
+                TranscriptionJob.partial_result.isnot(None)
+            ).update({"partial_result": None}, synchronize_session=False)
+        job.finished_at = func.now()
+        db.commit()
+    finally:
+        db.close()
+
+
+async def _run_job(job_id: int, answer_id: int):
+    # Session DB hanya dibuka sebentar sebelum dan sesudah transcribe, supaya
+    # koneksi pool background tidak tertahan selama panggilan model. Query sync
+    # jalan di thread (seperti _claim_next_job), bukan di event loop API.
+    try:
+        job_input = await asyncio.to_thread(_load_job_input, answer_id)
+        result = await transcribe_video(answer_id, *job_input) if job_input else None
+    except Exception as e:
+        result = {"error": str(e)}
+    await asyncio.to_thread(_save_job_result, job_id, answer_id, result)
+
+
+async def _transcription_worker(worker_id: int):
+    print(f"Transcription worker {worker_id} started")
+    while True:
+        try:
+            claimed = await asyncio.to_thread(_claim_next_job)
+        except Exception as e:
+            print(f"Transcription worker {worker_id} failed to claim job: {str(e)}")
+            claimed = None
+
+        if claimed is None:
+            _wakeup.clear()
+            try:
+                await asyncio.wait_for(_wakeup.wait(), timeout=settings.transcription_poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            continue
+
+        job_id, answer_id = claimed
+        if answer_id is None:
+            continue
+        print(f"Transcription worker {worker_id} running job {job_id} (answer {answer_id})")
+        await _run_job(job_id, answer_id)
+
+
+def start_transcription_workers():
+    global _worker_loop
+    _worker_loop = asyncio.get_running_loop()
+    for worker_id in range(settings.transcription_workers):
+        _worker_tasks.append(asyncio.create_task(_transcription_worker(worker_id)))
 
-    os.remove(audio_path)
 
-    return {"answer_id": answer_id, "transcript": answer.transcript}
+async def stop_transcription_workers():
+    for task in _worker_tasks:
+        task.cancel()
+    await asyncio.gather(*_worker_tasks, return_exceptions=True)
+    _worker_tasks.clear()
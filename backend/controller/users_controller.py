@@ -0,0 +1,210 @@
+import asyncio
+import csv
+import io
+import json
+from typing import Optional
+from pydantic import ValidationError
+from sqlalchemy import select, insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
+from config import settings
+from controller.password_controller import hash_password_async
+from models.list_questions import ListQuestions
+from models.users import User, UserRole, InterviewStatus
+from schemas.users import UserCreate, UserResponse, UserImportResult, UserImportResponse
+
+# Batas parameter per statement (Postgres maks 32767 bind parameter)
+IMPORT_BATCH_SIZE = 1000
+
+
+def to_user_response(user: User) -> UserResponse:
+    """
+    UserResponse dari User. Title list diambil dari relationship assigned_list,
+    jadi kalau user di-load dengan joinedload tidak ada query tambahan.
+    """
+    assigned_list = user.assigned_list if user.assigned_list_id else None
+    return UserResponse(
+        id_user=user.id_user,
+        name=user.name,
+        email=user.email,
+        role=user.role.value,
+        is_active=user.is_active,
+        assigned_list_id=user.assigned_list_id,
+        assigned_list_title=assigned_list.list_title if assigned_list else None,
+        interview_status=user.interview_status.value
+    )
+
+
+async def get_user_with_list(db: AsyncSession, user_id: int) -> Optional[User]:
+    result = await db.execute(
+        select(User)
+        .options(joinedload(User.assigned_list))
+        .where(User.id_user == user_id)
+    )
+    return result.scalars().first()
+
+
+async def list_users(
+    db: AsyncSession,
+    limit: Optional[int] = None,
+    cursor: Optional[int] = None,
+    interview_status: Optional[InterviewStatus] = None,
+    role: Optional[UserRole] = None,
+    list_id: Optional[int] = None,
+):
+    """
+    Satu query (users JOIN list_questions) dengan keyset pagination di id_user.
+    Return (users, next_cursor); next_cursor None kalau sudah halaman terakhir.
+    """
+    query = select(User).options(joinedload(User.assigned_list))
+
+    if interview_status is not None:
+        query = query.where(User.interview_status == interview_status)
+    if role is not None:
+        query = query.where(User.role == role)
+    if list_id is not None:
+        query = query.where(User.assigned_list_id == list_id)
+    if cursor is not None:
+        query = query.where(User.id_user > cursor)
+
+    query = query.order_by(User.id_user)
+    if limit is None:
+        result = await db.execute(query)
+        return result.scalars().all(), None
+
+    result = await db.execute(query.limit(limit + 1))
+    users = result.scalars().all()
+    next_cursor = None
+    if len(users) > limit:
+        users = users[:limit]
+        next_cursor = users[-1].id_user
+    return users, next_cursor
+
+
+def parse_import_rows(content: bytes, content_type: str):
+    """
+    Parse isi file import (CSV dengan header, atau JSON array of object).
+    Return (rows, error).
+    """
+    try:
+        text = content.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        return None, "File harus UTF-8"
+
+    if "json" in content_type:
+        try:
+            rows = json.loads(text)
+        except json.JSONDecodeError as e:
+            return None, f"JSON tidak valid: {e}"
+        if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+            return None, "JSON harus berupa array of object"
+        return rows, None
+
+    reader = csv.DictReader(io.StringIO(text))
+    if not reader.fieldnames:
+        return None, "CSV kosong atau tanpa header"
+    # Kolom kosong di CSV = tidak diisi
+    rows = [{k.strip(): v for k, v in row.items() if k and v not in (None, "")} for row in reader]
+    return rows, None
+
+
+def _chunks(items, size):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+async def import_users(db: AsyncSession, rows: list):
+    """
+    Bulk import user: validasi per baris, cek email & list secara set-based,
+    hash password paralel, lalu insert per batch dalam satu transaksi.
+    Return (UserImportResponse, error). Error hanya untuk kegagalan seluruh import.
+    """
+    if len(rows) > settings.user_import_max_rows:
+        return None, f"Maksimal {settings.user_import_max_rows} baris per import"
+
+    results = [None] * len(rows)
+    valid = {}  # index baris -> UserCreate
+    seen_emails = {}
+
+    for i, row in enumerate(rows):
+        try:
+            data = UserCreate.model_validate(row)
+        except ValidationError as e:
+            err = e.errors()[0]
+            field = ".".join(str(loc) for loc in err["loc"])
+            results[i] = UserImportResult(row=i + 1, email=row.get("email"), status="error", error=f"{field}: {err['msg']}")
+            continue
+
+        if data.role not in ("admin", "user"):
+            error = "Role harus 'admin' atau 'user'"
+        elif data.role == "admin" and data.assigned_list_id:
+            error = "Admin tidak memerlukan list assignment"
+        elif data.email in seen_emails:
+            error = f"Email duplikat dengan baris {seen_emails[data.email]}"
+        else:
+            error = None
+
+        if error:
+            results[i] = UserImportResult(row=i + 1, email=data.email, status="error", error=error)
+            continue
+        seen_emails[data.email] = i + 1
+        valid[i] = data
+
+    # Satu query per batch untuk email yang sudah terdaftar dan list yang valid
+    emails = [data.email for data in valid.values()]
+    existing_emails = set()
+    for batch in _chunks(emails, IMPORT_BATCH_SIZE):
+        existing_emails.update((await db.scalars(select(User.email).where(User.email.in_(batch)))).all())
+
+    list_ids = list({data.assigned_list_id for data in valid.values() if data.assigned_list_id})
+    known_list_ids = set()
+    for batch in _chunks(list_ids, IMPORT_BATCH_SIZE):
+        known_list_ids.update((await db.scalars(
+            select(ListQuestions.id_list_question).where(ListQuestions.id_list_question.in_(batch))
+        )).all())
+
+    for i, data in list(valid.items()):
+        if data.email in existing_emails:
+            error = "Email sudah terdaftar"
+        elif data.assigned_list_id and data.assigned_list_id not in known_list_ids:
+            error = "List pertanyaan tidak ditemukan"
+        else:
+            continue
+        results[i] = UserImportResult(row=i + 1, email=data.email, status="error", error=error)
+        del valid[i]
+
+    # Hash paralel di executor hashing (ukurannya dibatasi PASSWORD_HASH_WORKERS)
+    method = settings.password_import_hash_method or None
+    hashes = await asyncio.gather(*(hash_password_async(data.password, method) for data in valid.values()))
+
+    values = [
+        {
+            "name": data.name,
+            "email": data.email,
+            "password": password_hash,
+            "role": UserRole.ADMIN if data.role == "admin" else UserRole.USER,
+            "assigned_list_id": data.assigned_list_id if data.role == "user" else None,
+        }
+        for data, password_hash in zip(valid.values(), hashes)
+    ]
+
+    ids_by_email = {}
+    try:
+        for batch in _chunks(values, IMPORT_BATCH_SIZE):
+            result = await db.execute(insert(User).returning(User.id_user, User.email), batch)
+            ids_by_email.update({email: id_user for id_user, email in result.all()})
+        await db.commit()
+    except IntegrityError:
+        # Email yang sama disisipkan request lain di tengah import
+        await db.rollback()
+        return None, "Import dibatalkan: data bentrok dengan perubahan lain, coba lagi"
+
+    for i, data in valid.items():
+        results[i] = UserImportResult(row=i + 1, email=data.email, status="created", id_user=ids_by_email[data.email])
+
+    return UserImportResponse(
+        created=len(valid),
+        failed=len(rows) - len(valid),
+        results=results,
+    ), None
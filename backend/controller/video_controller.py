@@ -1,37 +1,84 @@
 import os
+import json
+import uuid
+import time
 import subprocess
 import shutil
+import hashlib
+import anyio
 from datetime import datetime
 from fastapi import HTTPException   
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy import or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from config import settings
 from models.users import User, InterviewStatus
 from models.questions import Questions
-from models.answer import Answer
+from models.list_questions import ListQuestionItems
+from models.answer import Answer, AnswerStatus
+from controller import transcode_controller, storage_controller
+from controller.auth_controller import invalidate_user_cache
+from controller import read_cache
 from models.users import User
 
 BASE_VIDEO_DIR = "videos"
+UPLOAD_SESSION_DIR = settings.upload_session_dir
+UPLOAD_CLEANUP_INTERVAL = 3600
+MAX_UPLOAD_BYTES = settings.max_upload_size_mb * 1024 * 1024
 
-async def save_hr_video(title: str, file, db: Session):
-    upload_dir = os.path.join(BASE_VIDEO_DIR, "hr")
-    os.makedirs(upload_dir, exist_ok=True)
 
-    # 2. Ambil ekstensi file asli
-    original_filename = file.filename
-    ext = os.path.splitext(original_filename)[1]
+class UploadTooLarge(Exception):
+    pass
 
-    # 3. Rename file sesuai title
-    safe_title = title.replace(" ", "_")
-    new_filename = f"{safe_title}{ext}"
-    filepath = os.path.join(upload_dir, new_filename)
 
+async def _stream_to_disk(file, filepath: str, max_bytes: int = MAX_UPLOAD_BYTES, digest=None) -> int:
+    """
+    Tulis UploadFile ke disk per chunk, jadi memori per upload konstan
+    (tidak tergantung panjang video). File parsial dihapus kalau gagal.
+    Kalau digest (hashlib) diisi, hash isi file dihitung sambil menulis.
+    """
+    written = 0
     try:
         with open(filepath, "wb") as buffer:
-            buffer.write(await file.read())
+            while True:
+                chunk = await file.read(settings.upload_chunk_size)
+                if not chunk:
+                    break
+                written += len(chunk)
+                if written > max_bytes:
+                    raise UploadTooLarge(f"File melebihi batas {settings.max_upload_size_mb} MB")
+                if digest is not None:
+                    digest.update(chunk)
+                buffer.write(chunk)
+    except BaseException:
+        if os.path.exists(filepath):
+            os.remove(filepath)
+        raise
+    return written
+
+async def save_hr_video(title: str, file, db: Session):
+    # Disimpan berdasarkan hash isi: video yang sama dipakai ulang, judul bebas diubah
+    ext = os.path.splitext(file.filename or "")[1] or ".webm"
+    temp_filepath = storage_controller.new_temp_path(ext)
+    digest = hashlib.sha256()
+
+    try:
+        size = await _stream_to_disk(file, temp_filepath, digest=digest)
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Gagal menyimpan file: {str(e)}")
 
+    # Query DB (sync session) + storage (bisa S3) blocking, jalankan di threadpool
+    return await run_in_threadpool(_insert_hr_video, title, temp_filepath, digest.hexdigest(), ext, size, db)
+
+def _insert_hr_video(title: str, temp_filepath: str, content_hash: str, ext: str, size: int, db: Session):
+    filepath = storage_controller.acquire(db, "hr", content_hash, ext, size)
+    is_new_file = storage_controller.store_file(temp_filepath, filepath)
+
     # 4. Insert langsung ke database
-    new_question = questions.Questions(
+    new_question = Questions(
         question_title=title,
         url_video=filepath,
         created_at=datetime.utcnow()
@@ -39,6 +86,8 @@ async def save_hr_video(title: str, file, db: Session):
     db.add(new_question)
     db.commit()
     db.refresh(new_question)
+    if is_new_file:
+        transcode_controller.submit_thumbnails(filepath)
 
     return {
         "message": "Question + video inserted",
@@ -47,7 +96,7 @@ async def save_hr_video(title: str, file, db: Session):
         "file_path": filepath
     }
 
-async def save_candidate_video(user_id: int, question_id: int, file, db: Session):
+def _start_candidate_interview(user_id: int, db: Session):
     user = db.query(User).filter(User.id_user == user_id).first()
     if not user:
         return None, "User not found"
@@ -58,154 +107,356 @@ async def save_candidate_video(user_id: int, question_id: int, file, db: Session
     if user.interview_status == InterviewStatus.not_started:
         user.interview_status = InterviewStatus.in_progress
         db.commit()
+        invalidate_user_cache(user_id)
 
-    user_name = user.name.replace(" ", "_")
-    user_dir = os.path.join(BASE_VIDEO_DIR, "kandidat", user_name)
-    os.makedirs(user_dir, exist_ok=True)
-
-    # Save the uploaded file with a temporary name
-    temp_filename = f"{user_name}_question{question_id}_temp.webm"
-    temp_filepath = os.path.join(user_dir, temp_filename)
+    return user, None
 
-    with open(temp_filepath, "wb") as f:
-        f.write(await file.read())
 
-    # Convert the file to MP4 using ffmpeg
-    output_filename = f"{user_name}_question{question_id}.mp4"
-    output_filepath = os.path.join(user_dir, output_filename).replace("\\", "/")
-    
-    try:
-        subprocess.run(['ffmpeg', '-i', temp_filepath, '-c:v', 'libx264', '-c:a', 'aac', '-strict', 'experimental', output_filepath], check=True)
-    except subprocess.CalledProcessError as e:
-        # Handle conversion error
-        return None, f"Failed to convert video: {e}"
-    finally:
-        # Clean up the temporary file
-        if os.path.exists(temp_filepath):
-            os.remove(temp_filepath)
+def _finalize_candidate_video(user: User, question_id: int, temp_filepath: str, content_hash: str, db: Session):
+    """
+    Buat Answer lalu transcode ke MP4 di background, jadi request upload tidak
+    menunggu encode selesai. Path MP4 diturunkan dari hash file upload: kalau
+    upload yang sama persis sudah pernah di-transcode, file itu dipakai ulang.
+    """
+    size = os.path.getsize(temp_filepath)
+    output_filepath = storage_controller.acquire(db, "answers", content_hash, ".mp4", size)
+    already_stored = storage_controller.is_stored(output_filepath)
 
     answer = Answer(
-        user_id=user_id,
+        user_id=user.id_user,
         question_id=question_id,
-        video_url=output_filepath
+        video_url=output_filepath,
+        status=AnswerStatus.ready.value if already_stored else AnswerStatus.processing.value
     )
     db.add(answer)
     db.commit()
 
+    if already_stored:
+        os.remove(temp_filepath)
+    else:
+        transcode_controller.submit_answer_transcode(answer.id, temp_filepath, output_filepath)
+
     return output_filepath, None
 
 
-def get_hr_video(question_id: int, db: Session):
-    question = db.query(questions).filter(questions.id_question == question_id).first()
+async def save_candidate_video(user_id: int, question_id: int, file, db: Session):
+    user, error = await run_in_threadpool(_start_candidate_interview, user_id, db)
+    if error:
+        return None, error
+
+    temp_filepath = storage_controller.new_temp_path(".webm")
+    digest = hashlib.sha256()
+    try:
+        await _stream_to_disk(file, temp_filepath, digest=digest)
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+
+    # Query DB + cek blob di storage (bisa S3) blocking, jalankan di threadpool
+    return await run_in_threadpool(_finalize_candidate_video, user, question_id, temp_filepath, digest.hexdigest(), db)
+
+
+# === Resumable upload ===
+# Satu sesi = file .part + metadata .json di UPLOAD_SESSION_DIR. Client kirim
+# chunk berurutan dengan offset; kalau koneksi putus, cek offset lalu lanjut.
+# Folder sesi tidak disajikan static; sesi yang ditinggal dihapus setelah TTL.
+
+_last_upload_cleanup = 0.0
+# Sesi yang sedang menerima chunk. Retry client (timeout) saat request pertama
+# masih streaming ditolak, supaya dua request tidak append ke .part bersamaan.
+# Cukup per proses: app jalan sebagai satu proses uvicorn.
+_active_uploads = set()
+
+def _upload_paths(upload_id: str):
+    # upload_id selalu uuid hex, tolak selain itu supaya tidak bisa path traversal
+    if len(upload_id) != 32 or not all(c in "0123456789abcdef" for c in upload_id):
+        return None, None
+    base = os.path.join(UPLOAD_SESSION_DIR, upload_id)
+    return base + ".part", base + ".json"
+
+
+def _load_upload_session(upload_id: str, user_id: int):
+    part_path, meta_path = _upload_paths(upload_id)
+    if not meta_path or not os.path.exists(meta_path):
+        return None, None, "Upload session not found"
+    with open(meta_path) as f:
+        meta = json.load(f)
+    if meta["user_id"] != user_id:
+        return None, None, "Upload session not found"
+    return meta, part_path, None
+
+
+def cleanup_upload_sessions() -> int:
+    """Hapus sesi yang tidak aktif (chunk terakhir) lebih lama dari UPLOAD_SESSION_TTL_HOURS."""
+    if not os.path.isdir(UPLOAD_SESSION_DIR):
+        return 0
+    cutoff = time.time() - settings.upload_session_ttl_hours * 3600
+    removed = 0
+    for upload_id in {os.path.splitext(name)[0] for name in os.listdir(UPLOAD_SESSION_DIR)}:
+        part_path, meta_path = _upload_paths(upload_id)
+        if part_path is None:
+            continue
+        paths = [p for p in (part_path, meta_path) if os.path.exists(p)]
+        try:
+            if not paths or max(os.path.getmtime(p) for p in paths) >= cutoff:
+                continue
+            for path in paths:
+                os.remove(path)
+        except OSError:
+            continue
+        removed += 1
+    return removed
+
+
+def _maybe_cleanup_upload_sessions():
+    global _last_upload_cleanup
+    now = time.monotonic()
+    if now - _last_upload_cleanup < UPLOAD_CLEANUP_INTERVAL:
+        return
+    _last_upload_cleanup = now
+    cleanup_upload_sessions()
+
+
+def create_upload_session(user_id: int, question_id: int, db: Session):
+    user, error = _start_candidate_interview(user_id, db)
+    if error:
+        return None, error
+
+    _maybe_cleanup_upload_sessions()
+    os.makedirs(UPLOAD_SESSION_DIR, exist_ok=True)
+    upload_id = uuid.uuid4().hex
+    part_path, meta_path = _upload_paths(upload_id)
+    open(part_path, "wb").close()
+    with open(meta_path, "w") as f:
+        json.dump({
+            "user_id": user_id,
+            "question_id": question_id,
+            "created_at": datetime.utcnow().isoformat()
+        }, f)
+
+    return {
+        "upload_id": upload_id,
+        "offset": 0,
+        "chunk_size": settings.upload_chunk_size,
+        "max_size": MAX_UPLOAD_BYTES
+    }, None
+
+
+def get_upload_session(upload_id: str, user_id: int):
+    meta, part_path, error = _load_upload_session(upload_id, user_id)
+    if error:
+        return None, error
+    return {"upload_id": upload_id, "offset": os.path.getsize(part_path)}, None
+
+
+async def append_upload_chunk(upload_id: str, user_id: int, offset: int, stream):
+    """
+    Append body request ke file .part. Offset harus sama dengan ukuran file
+    sekarang; kalau beda (chunk dobel / hilang) client dapat offset yang benar.
+    """
+    meta, part_path, error = await anyio.to_thread.run_sync(_load_upload_session, upload_id, user_id)
+    if error:
+        return None, 404, error
+
+    if upload_id in _active_uploads:
+        current = await anyio.to_thread.run_sync(os.path.getsize, part_path)
+        return {"upload_id": upload_id, "offset": current}, 409, "Upload in progress"
+
+    _active_uploads.add(upload_id)
+    try:
+        # Ukuran dicek ulang setelah sesi dikunci
+        current = await anyio.to_thread.run_sync(os.path.getsize, part_path)
+        if offset != current:
+            return {"upload_id": upload_id, "offset": current}, 409, "Offset mismatch"
+
+        written = current
+        async with await anyio.open_file(part_path, "ab") as f:
+            async for chunk in stream:
+                written += len(chunk)
+                if written > MAX_UPLOAD_BYTES:
+                    await f.truncate(current)
+                    return None, 413, f"File melebihi batas {settings.max_upload_size_mb} MB"
+                await f.write(chunk)
+    finally:
+        _active_uploads.discard(upload_id)
+
+    return {"upload_id": upload_id, "offset": written}, None, None
+
+
+def complete_upload_session(upload_id: str, user_id: int, db: Session):
+    meta, part_path, error = _load_upload_session(upload_id, user_id)
+    if error:
+        return None, error
+
+    user, error = _start_candidate_interview(user_id, db)
+    if error:
+        return None, error
+
+    # Keluarkan dari folder sesi dulu, supaya cleanup TTL tidak menghapus
+    # file yang masih menunggu giliran transcode
+    temp_filepath = storage_controller.new_temp_path(".webm")
+    shutil.move(part_path, temp_filepath)
+    _, meta_path = _upload_paths(upload_id)
+    if os.path.exists(meta_path):
+        os.remove(meta_path)
+
+    content_hash = storage_controller.file_sha256(temp_filepath)
+    return _finalize_candidate_video(user, meta["question_id"], temp_filepath, content_hash, db)
+
+
+async def get_hr_video(question_id: int, db: AsyncSession):
+    result = await db.execute(select(Questions).where(Questions.id_question == question_id))
+    question = result.scalars().first()
     if not question or not question.url_video:
         return None, "Video not found"
-    if not os.path.exists(question.url_video):
-        return None, "File not found"
     return question.url_video, None
 
 
-def get_candidate_video(user_id: int, question_id: int, db: Session):
-    answer = db.query(answer).filter(
-        answer.user_id == user_id,
-        answer.question_id == question_id
-    ).first()
+async def get_candidate_video(user_id: int, question_id: int, db: AsyncSession):
+    result = await db.execute(
+        select(Answer)
+        .where(Answer.user_id == user_id, Answer.question_id == question_id)
+        .order_by(Answer.id.desc())
+    )
+    answer = result.scalars().first()
 
     if not answer or not answer.video_url:
         return None, "Video not found"
-    if not os.path.exists(answer.video_url):
-        return None, "File not found"
     return answer.video_url, None
 
 
-def list_hr_videos(db: Session):
-    return db.query(Questions).all()
+async def list_hr_videos(db: AsyncSession):
+    result = await db.execute(select(Questions))
+    return result.scalars().all()
 
 
-def list_candidate_videos(db: Session):
-    return db.query(Answer).all()
+async def list_candidate_videos(db: AsyncSession):
+    result = await db.execute(select(Answer))
+    return result.scalars().all()
 
 
-def list_videos_by_user(user_id: int, db: Session):
-    return (
-        db.query(Answer, Questions.question_title)
+async def list_videos_by_user(user_id: int, db: AsyncSession):
+    result = await db.execute(
+        select(Answer, Questions.question_title)
         .join(Questions, Answer.question_id == Questions.id_question)
-        .filter(Answer.user_id == user_id)
-        .all()
+        .where(Answer.user_id == user_id)
     )
+    return result.all()
+
 
+async def list_videos_by_question(question_id: int, db: AsyncSession):
+    result = await db.execute(select(Answer).where(Answer.question_id == question_id))
+    return result.scalars().all()
 
-def list_videos_by_question(question_id: int, db: Session):
-    return db.query(Answer).filter(Answer.question_id == question_id).all()
-
-def get_answers_by_user_and_list(user_id: int, list_id: int, db: Session):
-    return db.query(Answer).filter(Answer.user_id == user_id, Answer.id_list_questions == list_id).all()
-
-def list_all_candidate_answers(db: Session):
-    return (
-        db.query(
-            Answer.id,
-            Answer.video_url,
-            Answer.transcript,
-            User.id_user,
-            User.name,
-            User.email,
-            Questions.id_question,
-            Questions.question_title
-        )
+async def get_answers_by_user_and_list(user_id: int, list_id: int, db: AsyncSession):
+    result = await db.execute(
+        select(Answer).where(Answer.user_id == user_id, Answer.id_list_questions == list_id)
+    )
+    return result.scalars().all()
+
+# Kolom berat yang hanya dikirim kalau diminta lewat fields=
+OPTIONAL_ANSWER_FIELDS = {
+    "transcript": Answer.transcript,
+    "transcript_segments": Answer.transcript_segments,
+}
+
+
+async def list_all_candidate_answers(
+    db: AsyncSession,
+    limit: int = None,
+    cursor: int = None,
+    user_id: int = None,
+    question_id: int = None,
+    list_id: int = None,
+    has_transcript: bool = None,
+    fields=(),
+):
+    """
+    Jawaban kandidat + user + pertanyaan, keyset pagination di Answer.id.
+    Return (rows, next_cursor); next_cursor None kalau sudah halaman terakhir.
+    """
+    columns = [
+        Answer.id,
+        Answer.video_url,
+        Answer.status,
+        User.id_user,
+        User.name,
+        User.email,
+        Questions.id_question,
+        Questions.question_title
+    ] + [OPTIONAL_ANSWER_FIELDS[f] for f in fields]
+
+    query = (
+        select(*columns)
         .join(User, Answer.user_id == User.id_user)
         .join(Questions, Answer.question_id == Questions.id_question)
-        .all()
     )
 
-
-async def update_hr_video_title(question_id: int, new_title: str, db: Session):
+    if user_id is not None:
+        query = query.where(Answer.user_id == user_id)
+    if question_id is not None:
+        query = query.where(Answer.question_id == question_id)
+    if list_id is not None:
+        list_questions = select(ListQuestionItems.question_id).where(ListQuestionItems.list_id == list_id)
+        query = query.where(Answer.question_id.in_(list_questions))
+    if has_transcript is True:
+        query = query.where(Answer.transcript.isnot(None), Answer.transcript != "")
+    elif has_transcript is False:
+        query = query.where(or_(Answer.transcript.is_(None), Answer.transcript == ""))
+    if cursor is not None:
+        query = query.where(Answer.id > cursor)
+
+    query = query.order_by(Answer.id)
+    if limit is None:
+        result = await db.execute(query)
+        return result.all(), None
+
+    result = await db.execute(query.limit(limit + 1))
+    rows = result.all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = rows[-1].id
+    return rows, next_cursor
+
+
+def update_hr_video_title(question_id: int, new_title: str, db: Session):
     video = db.query(Questions).filter(Questions.id_question == question_id).first()
     if not video:
         return False
-    
-    old_filepath = video.url_video
-    
-    # Extract directory and extension
-    directory = os.path.dirname(old_filepath)
-    ext = os.path.splitext(old_filepath)[1]
-    
-    # Create new filename
-    safe_new_title = new_title.replace(" ", "_")
-    new_filename = f"{safe_new_title}{ext}"
-    new_filepath = os.path.join(directory, new_filename)
-
-    # Rename the file on the filesystem
-    if os.path.exists(old_filepath):
-        os.rename(old_filepath, new_filepath)
-    
+
+    # File disimpan berdasarkan hash isi, jadi ganti judul tidak perlu rename file
     video.question_title = new_title
-    video.url_video = new_filepath
     db.commit()
     db.refresh(video)
+    read_cache.invalidate(read_cache.LISTS_KEY)
     return video
 
-async def delete_hr_video_by_id(question_id: int, db: Session):
+def delete_hr_video_by_id(question_id: int, db: Session):
     video = db.query(Questions).filter(Questions.id_question == question_id).first()
     if not video:
         return False
-    
-    # Delete the video file from the file system
-    if os.path.exists(video.url_video):
-        os.remove(video.url_video)
 
+    path = video.url_video
+    remove_file = storage_controller.release(db, path)
     db.delete(video)
     db.commit()
+    read_cache.invalidate(read_cache.LISTS_KEY)
+
+    # File dihapus hanya kalau tidak ada pertanyaan / jawaban lain yang memakainya
+    if remove_file:
+        storage_controller.remove_video_files(path)
     return True
 
-async def delete_candidate_video(answer_id: int, db: Session):
+def delete_candidate_video(answer_id: int, db: Session):
     answer = db.query(Answer).filter(Answer.id == answer_id).first()
     if not answer:
         return False
 
-    # Delete the video file from the file system
-    if os.path.exists(answer.video_url):
-        os.remove(answer.video_url)
-
+    path = answer.video_url
+    remove_file = storage_controller.release(db, path)
     db.delete(answer)
     db.commit()
+
+    if remove_file:
+        storage_controller.remove_video_files(path)
     return True
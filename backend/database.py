@@ -1,16 +1,71 @@
-import os
-from dotenv import load_dotenv
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.orm import sessionmaker, declarative_base
+from config import settings
 
-# Load .env
-load_dotenv()
 
+DATABASE_URL = settings.database_url
 
-DATABASE_URL = os.getenv("DATABASE_URL")
 
-engine = create_engine(DATABASE_URL)
+def _async_url(url: str) -> str:
+    for prefix, async_prefix in (
+        ("postgresql+psycopg2://", "postgresql+asyncpg://"),
+        ("postgresql://", "postgresql+asyncpg://"),
+        ("postgres://", "postgresql+asyncpg://"),
+        ("sqlite://", "sqlite+aiosqlite://"),
+    ):
+        if url.startswith(prefix):
+            return async_prefix + url[len(prefix):]
+    return url
+
+
+ASYNC_DATABASE_URL = settings.async_database_url or _async_url(DATABASE_URL)
+
+
+def _pool_args(url: str, pool_size: int, max_overflow: int) -> dict:
+    # SQLite (dev/test) tidak memakai QueuePool, jadi argumen sizing tidak berlaku
+    if url.startswith("sqlite"):
+        return {}
+    return {"pool_size": pool_size, "max_overflow": max_overflow, "pool_timeout": settings.db_pool_timeout}
+
+
+def _make_engine(pool_size: int, max_overflow: int):
+    connect_args = {}
+    if settings.db_statement_timeout_ms and DATABASE_URL.startswith("postgresql"):
+        connect_args["options"] = f"-c statement_timeout={settings.db_statement_timeout_ms}"
+
+    return create_engine(
+        DATABASE_URL,
+        **_pool_args(DATABASE_URL, pool_size, max_overflow),
+        pool_recycle=settings.db_pool_recycle,
+        pool_pre_ping=settings.db_pool_pre_ping,
+        echo=settings.db_echo,
+        connect_args=connect_args,
+    )
+
+
+engine = _make_engine(settings.db_pool_size, settings.db_max_overflow)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+# Untuk worker background (transcription queue, transcoding)
+background_engine = _make_engine(settings.db_background_pool_size, settings.db_background_max_overflow)
+BackgroundSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=background_engine)
+
+# Untuk handler async: query di-await, jadi event loop tidak diblok
+_async_connect_args = {}
+if settings.db_statement_timeout_ms and ASYNC_DATABASE_URL.startswith("postgresql+asyncpg"):
+    _async_connect_args["server_settings"] = {"statement_timeout": str(settings.db_statement_timeout_ms)}
+
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    **_pool_args(ASYNC_DATABASE_URL, settings.db_pool_size, settings.db_max_overflow),
+    pool_recycle=settings.db_pool_recycle,
+    pool_pre_ping=settings.db_pool_pre_ping,
+    echo=settings.db_echo,
+    connect_args=_async_connect_args,
+)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
 
 
@@ -20,3 +75,28 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def _pool_stats(pool):
+    if not hasattr(pool, "checkedout"):
+        return {"status": pool.status()}
+    return {
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": pool.overflow(),
+        "status": pool.status(),
+    }
+
+
+def pool_stats():
+    return {
+        "request": _pool_stats(engine.pool),
+        "background": _pool_stats(background_engine.pool),
+        "async": _pool_stats(async_engine.sync_engine.pool),
+    }
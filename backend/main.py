@@ -9,12 +9,21 @@ from api.auth_api import router as auth_router
 from api.transcript_api import router as transcript_router
 from api.jobs_api import router as jobs_router
 from api.matching_api import router as matching_router # Added this import
+from api.metrics_api import router as metrics_router
+from api.media_api import router as media_router
 from fastapi.staticfiles import StaticFiles
+from controller.media_response import RangeStaticFiles
+from starlette.concurrency import run_in_threadpool
+from controller import matching_controller, transcript_controller, transcode_controller, password_controller, storage_backend
+from transcript import model as transcript_model
 
 
 app = FastAPI(title=settings.app_name, debug=settings.debug)
-app.mount("/videos", StaticFiles(directory="videos"), name="videos")
-app.mount("/static", StaticFiles(directory="static"), name="static")
+if storage_backend.get_backend().is_local:
+    app.mount("/videos", RangeStaticFiles(directory="videos"), name="videos")
+    app.mount("/static", StaticFiles(directory="static"), name="static")
+else:
+    app.include_router(media_router)
 # CORS setup
 app.add_middleware(
     CORSMiddleware,
@@ -22,6 +31,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag", "Content-Range", "Accept-Ranges"],
 )
 app.include_router(list_router, prefix="/list")
 app.include_router(question_router, prefix="/questions")
@@ -31,5 +41,24 @@ app.include_router(auth_router, prefix="/auth")
 app.include_router(transcript_router, prefix="/transcript")
 app.include_router(jobs_router, prefix="/jobs")
 app.include_router(matching_router, prefix="/matching") # Added this line
+app.include_router(metrics_router, prefix="/metrics")
+
+@app.on_event("startup")
+async def warm_up_models():
+    if settings.embed_model_warmup:
+        await run_in_threadpool(matching_controller.warm_up_embed_model)
+
+@app.on_event("startup")
+async def start_background_workers():
+    transcript_controller.start_transcription_workers()
+    await run_in_threadpool(transcode_controller.recover_pending_transcodes)
+
+@app.on_event("shutdown")
+async def stop_background_workers():
+    await transcript_controller.stop_transcription_workers()
+    await transcript_model.close_http_client()
+    await run_in_threadpool(transcode_controller.shutdown_transcode_pool)
+    await run_in_threadpool(password_controller.shutdown_password_pool)
+    await run_in_threadpool(storage_backend.shutdown_storage_pool)
 # Logging config
 
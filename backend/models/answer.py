@@ -1,17 +1,32 @@
 from database import Base
-from sqlalchemy import Column, Integer, String, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, ForeignKey, Text, Index
 from sqlalchemy.orm import relationship
+import enum
+
+class AnswerStatus(str, enum.Enum):
+    processing = "processing"
+    ready = "ready"
+    failed = "failed"
 
 class Answer(Base):
     __tablename__ = "answers"
+    __table_args__ = (
+        # Lookup per kandidat (matching, list_videos_by_user) dan per kandidat + pertanyaan / list
+        Index("ix_answers_user_id_question_id", "user_id", "question_id"),
+        Index("ix_answers_user_id_id_list_questions", "user_id", "id_list_questions"),
+    )
     
     id = Column(Integer, primary_key=True, index=True, nullable=False)
     user_id = Column(Integer, ForeignKey("users.id_user"), nullable=False)
-    question_id = Column(Integer, ForeignKey("questions.id_question"), nullable=False)
-    id_list_questions = Column(Integer, ForeignKey("list_questions.id_list_question"), nullable=True)
+    question_id = Column(Integer, ForeignKey("questions.id_question"), nullable=False, index=True)
+    id_list_questions = Column(Integer, ForeignKey("list_questions.id_list_question"), nullable=True, index=True)
     video_url = Column(String(512), nullable=False)
     transcript = Column(Text, nullable=True)
+    # JSON list [{"start", "end", "text"}] per segmen audio
+    transcript_segments = Column(Text, nullable=True)
+    # processing selama video masih di-transcode di background
+    status = Column(String(20), default=AnswerStatus.ready.value, nullable=False)
 
     # Relationships
     user = relationship("User", back_populates="answers")
-    question = relationship("Questions")
\ No newline at end of file
+    question = relationship("Questions")
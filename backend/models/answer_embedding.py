@@ -0,0 +1,14 @@
+from database import Base
+from sqlalchemy import Column, Integer, String, ForeignKey, LargeBinary, DateTime
+from sqlalchemy.sql import func
+
+class AnswerEmbedding(Base):
+    __tablename__ = "answer_embeddings"
+
+    answer_id = Column(Integer, ForeignKey("answers.id", ondelete="CASCADE"), primary_key=True, nullable=False)
+    # sha256 dari Answer.transcript saat embedding dihitung
+    content_hash = Column(String(64), nullable=False)
+    model_name = Column(String(255), nullable=False)
+    # Vektor float32 yang sudah dinormalisasi, disimpan sebagai bytes
+    embedding = Column(LargeBinary, nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
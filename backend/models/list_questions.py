@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, Boolean, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, Boolean, ForeignKey, UniqueConstraint
 from sqlalchemy.orm import relationship
 from database import Base
 
@@ -12,15 +12,22 @@ class ListQuestions(Base):
     questions = relationship(
         "Questions",
         secondary="list_question_items",
-        back_populates="lists"
+        back_populates="lists",
+        order_by="ListQuestionItems.position"
     )
     assigned_users = relationship("User", back_populates="assigned_list")
 
 
 class ListQuestionItems(Base):
     __tablename__ = "list_question_items"
+    __table_args__ = (
+        # Satu pertanyaan hanya sekali per list; index ini juga dipakai untuk lookup per list_id
+        UniqueConstraint("list_id", "question_id", name="uq_list_question_items_list_id_question_id"),
+    )
 
     id_lqi = Column(Integer, primary_key=True, index=True, nullable=False)
     list_id = Column(Integer, ForeignKey("list_questions.id_list_question"), nullable=False)
-    question_id = Column(Integer, ForeignKey("questions.id_question"), nullable=False)
+    question_id = Column(Integer, ForeignKey("questions.id_question"), nullable=False, index=True)
+    # Urutan pertanyaan di list (0-based, sesuai urutan video_ids)
+    position = Column(Integer, nullable=False, default=0, server_default="0")
 
@@ -1,5 +1,6 @@
 from sqlalchemy import Column, Integer, String, Boolean, Text, ForeignKey
 from database import Base
+from config import settings
 from werkzeug.security import generate_password_hash, check_password_hash
 from sqlalchemy import Column, Integer, String, Text, ForeignKey
 from sqlalchemy.orm import relationship
@@ -26,7 +27,7 @@ class User(Base):
     is_active = Column(Boolean, default=True, nullable=False)
     answers = relationship("Answer", back_populates="user")
     assigned_list = relationship("ListQuestions", back_populates="assigned_users")
-    assigned_list_id = Column(Integer, ForeignKey("list_questions.id_list_question"), nullable=True)
+    assigned_list_id = Column(Integer, ForeignKey("list_questions.id_list_question"), nullable=True, index=True)
     interview_status = Column(Enum(InterviewStatus, native_enum=False), default=InterviewStatus.not_started, nullable=False)
 
 
@@ -34,7 +35,7 @@ class User(Base):
         return f'<User {self.name} - {self.role}>'
 
     def setpassword(self, password):
-        self.password = generate_password_hash(password)
+        self.password = generate_password_hash(password, method=settings.password_hash_method)
     
     def checkpassword(self, password):
         return check_password_hash(self.password, password)
@@ -0,0 +1,21 @@
+from database import Base
+from sqlalchemy import Column, Integer, String, BigInteger, DateTime, Text
+from sqlalchemy.sql import func
+
+class VideoBlob(Base):
+    """
+    Satu file video di storage content-addressed. ref_count = jumlah baris
+    Answer / Questions yang menunjuk ke path ini; file dihapus saat jadi 0.
+    """
+    __tablename__ = "video_blobs"
+
+    # Path relatif seperti video_url, mis. videos/store/answers/ab/cd/<sha256>.mp4
+    path = Column(String(500), primary_key=True, nullable=False)
+    # sha256 dari file yang di-upload (untuk jawaban: sebelum transcode)
+    content_hash = Column(String(64), nullable=False, index=True)
+    size = Column(BigInteger, nullable=True)
+    ref_count = Column(Integer, nullable=False, default=0, server_default="0")
+    # JSON list key media turunan yang sudah dibuat (poster_url, hls_url, ...),
+    # NULL = belum pernah dicatat (URL-nya dicek langsung ke storage)
+    derived_media = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
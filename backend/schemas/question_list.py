@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import List
+from typing import List, Optional
 
 class QuestionInListResponse(BaseModel):
     id_question: int
@@ -12,7 +12,7 @@ class QuestionInListResponse(BaseModel):
 class ListWithQuestionsResponse(BaseModel):
     id_list_question: int
     list_title: str
-    minutes: int
+    minutes: Optional[int] = None
     questions: List[QuestionInListResponse]
 
     class Config:
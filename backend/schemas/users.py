@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr
-from typing import Optional
+from typing import List, Optional
 
 class UserCreate(BaseModel):
     name: str
@@ -30,4 +30,16 @@ class UserResponse(BaseModel):
 
 class AssignListRequest(BaseModel):
     user_id: int
-    list_id: Optional[int] = None
\ No newline at end of file
+    list_id: Optional[int] = None
+
+class UserImportResult(BaseModel):
+    row: int
+    email: Optional[str] = None
+    status: str
+    id_user: Optional[int] = None
+    error: Optional[str] = None
+
+class UserImportResponse(BaseModel):
+    created: int
+    failed: int
+    results: List[UserImportResult]
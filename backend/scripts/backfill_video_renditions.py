@@ -0,0 +1,73 @@
+"""
+Backfill video jawaban kandidat yang sudah ada: remux ke MP4 faststart
+(tanpa re-encode), buat poster + sprite sheet, dan jika TRANSCODE_PREVIEW /
+TRANSCODE_HLS aktif, buat rendition preview / HLS-nya. Video pertanyaan HR
+hanya dibuatkan poster + sprite. Media yang dibuat dicatat di video_blobs.derived_media.
+
+Jalankan dari folder backend:
+    python scripts/backfill_video_renditions.py
+    TRANSCODE_HLS=true python scripts/backfill_video_renditions.py --skip-faststart
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import BackgroundSessionLocal
+from models.answer import Answer, AnswerStatus
+from models.questions import Questions
+from controller import transcode_controller, storage_backend, storage_controller
+
+
+def faststart(storage, path: str, src: str):
+    tmp = storage_backend.scratch_path(".mp4")
+    try:
+        subprocess.run(
+            ["ffmpeg", "-y", "-i", src, "-map", "0", "-c", "copy", "-movflags", "+faststart", tmp],
+            check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        storage.put_file(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--skip-faststart", action="store_true")
+    args = parser.parse_args()
+
+    db = BackgroundSessionLocal()
+    try:
+        paths = [
+            video_url for (video_url,) in db.query(Answer.video_url)
+            .filter(Answer.status == AnswerStatus.ready.value)
+            .order_by(Answer.id)
+        ]
+        hr_paths = [url_video for (url_video,) in db.query(Questions.url_video).order_by(Questions.id_question)]
+    finally:
+        db.close()
+
+    # Satu file bisa dipakai beberapa jawaban / pertanyaan (video store), proses sekali
+    storage = storage_backend.get_backend()
+    for path in dict.fromkeys(filter(None, hr_paths)):
+        if not storage.exists(path):
+            continue
+        print(path)
+        transcode_controller.build_derived_media(path, renditions=False)
+
+    for path in dict.fromkeys(paths):
+        if not path.endswith(".mp4") or not storage.exists(path):
+            continue
+        print(path)
+        # File di video store immutable (hash = isi) dan sudah faststart saat transcode
+        if not args.skip_faststart and not storage_controller.is_stored_path(path):
+            with storage.fetch(path) as src:
+                faststart(storage, path, src)
+        transcode_controller.build_derived_media(path, renditions=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""
+Benchmark hash password: login (verify) per detik dengan 1..N worker executor,
+untuk memilih PASSWORD_HASH_METHOD dan PASSWORD_HASH_WORKERS.
+
+    python scripts/bench_password_hash.py --method scrypt --method pbkdf2:sha256:600000
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.security import generate_password_hash, check_password_hash
+
+
+def bench(method: str, workers: int, logins: int) -> float:
+    password = "correct horse battery staple"
+    stored = generate_password_hash(password, method=method)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        start = time.perf_counter()
+        results = list(pool.map(lambda _: check_password_hash(stored, password), range(logins)))
+        elapsed = time.perf_counter() - start
+    assert all(results)
+    return logins / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--method", action="append", help="method werkzeug (bisa diulang)")
+    parser.add_argument("--logins", type=int, default=64, help="jumlah verify per percobaan")
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    methods = args.method or ["scrypt", "pbkdf2:sha256"]
+    worker_counts = sorted({1, 2, 4, args.max_workers} & set(range(1, args.max_workers + 1)))
+
+    print(f"{'method':<28}{'workers':>8}{'logins/s':>12}{'per core':>12}")
+    for method in methods:
+        for workers in worker_counts:
+            rate = bench(method, workers, args.logins)
+            print(f"{method:<28}{workers:>8}{rate:>12.1f}{rate / workers:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Stub server Kobold /api/extra/transcribe untuk tes transport transcriber
+secara lokal. Menerima mode json, multipart dan raw, lalu membalas ukuran
+audio yang diterima sebagai "text".
+
+    python scripts/kobold_stub.py --port 5001
+    KOBOLD_API_BASE=http://localhost:5001 KOBOLD_TRANSCRIBE_MODE=json uvicorn main:app
+"""
+import argparse
+import base64
+import json
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        if not self.path.startswith("/api/extra/transcribe"):
+            self.send_error(404)
+            return
+
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length)
+        content_type = self.headers.get("Content-Type", "")
+
+        try:
+            if content_type.startswith("application/json"):
+                payload = json.loads(body)
+                audio = base64.b64decode(payload["audio_data"].split(",", 1)[1])
+            elif content_type.startswith("multipart/form-data"):
+                boundary = content_type.split("boundary=", 1)[1].encode()
+                file_part = next(p for p in body.split(b"--" + boundary) if b'filename="' in p)
+                audio = file_part.split(b"\r\n\r\n", 1)[1].rsplit(b"\r\n", 1)[0]
+            else:
+                audio = body
+        except Exception as e:
+            self.send_error(400, str(e))
+            return
+
+        is_wav = audio[:4] == b"RIFF"
+        response = json.dumps({
+            "text": f"stub transcript: {len(audio)} bytes, wav={is_wav}, mode={content_type.split(';')[0]}"
+        }).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(response)))
+        self.end_headers()
+        self.wfile.write(response)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=5001)
+    args = parser.parse_args()
+    print(f"Kobold stub listening on http://localhost:{args.port}")
+    ThreadingHTTPServer(("", args.port), StubHandler).serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Ukur cold-start worker: waktu import `main` dan RSS proses setelahnya,
+lalu (opsional) waktu load + warm-up model embedding.
+
+Jalankan dari folder backend:
+    python scripts/measure_startup.py
+    python scripts/measure_startup.py --warmup
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+CHILD = r"""
+import json, resource, sys, time
+start = time.perf_counter()
+import main
+import_s = time.perf_counter() - start
+result = {"import_main_s": import_s, "rss_after_import_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}
+if "--warmup" in sys.argv:
+    from controller import matching_controller
+    start = time.perf_counter()
+    matching_controller.warm_up_embed_model()
+    result["warmup_s"] = time.perf_counter() - start
+    result["rss_after_warmup_mb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+print("RESULT " + json.dumps(result))
+"""
+
+
+def run_once(warmup: bool):
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    args = [sys.executable, "-c", CHILD] + (["--warmup"] if warmup else [])
+    out = subprocess.run(args, cwd=backend_dir, capture_output=True, text=True, check=True)
+    for line in out.stdout.splitlines():
+        if line.startswith("RESULT "):
+            return json.loads(line[len("RESULT "):])
+    raise RuntimeError(out.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--warmup", action="store_true", help="ikut ukur load + warm-up model embedding")
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    results = [run_once(args.warmup) for _ in range(args.runs)]
+    for key in results[0]:
+        values = sorted(r[key] for r in results)
+        print(f"{key:>22}: median {values[len(values) // 2]:.2f}  (min {values[0]:.2f}, max {values[-1]:.2f})")
+
+
+if __name__ == "__main__":
+    main()
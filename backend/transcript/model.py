@@ -1,22 +1,72 @@
 import os
-import json
-import base64
-import requests
+import httpx
 import asyncio
 import subprocess
 import tempfile
-from typing import Dict, Any
+import wave
+from typing import Dict, Any, Optional, List, Tuple
+from transcript import transport
 
 # === Configuration ===
 KOBOLD_API_BASE = os.getenv("KOBOLD_API_BASE", "http://pe.spil.co.id/kobold").rstrip("/")
 KOBOLD_API_KEY = os.getenv("KOBOLD_API_KEY", "")
+# json (default, format Kobold) | multipart | raw
+KOBOLD_TRANSCRIBE_MODE = os.getenv("KOBOLD_TRANSCRIBE_MODE", "json")
+# Maksimum request transcribe paralel ke Kobold dari satu worker
+KOBOLD_MAX_CONCURRENCY = int(os.getenv("KOBOLD_MAX_CONCURRENCY", "4"))
+KOBOLD_CONNECT_TIMEOUT = float(os.getenv("KOBOLD_CONNECT_TIMEOUT", "10"))
+KOBOLD_READ_TIMEOUT = float(os.getenv("KOBOLD_READ_TIMEOUT", "300"))
+KOBOLD_MAX_RETRIES = int(os.getenv("KOBOLD_MAX_RETRIES", "3"))
+KOBOLD_RETRY_BACKOFF = float(os.getenv("KOBOLD_RETRY_BACKOFF", "1.0"))
 
-def extract_audio_from_video(video_path: str) -> str:
-    """Extract audio as WAV from a video using ffmpeg."""
+RETRY_STATUS_CODES = {429, 502, 503, 504}
+
+# Audio panjang dipecah jadi segmen (dengan overlap) yang ditranscribe paralel
+TRANSCRIBE_SEGMENT_SECONDS = float(os.getenv("TRANSCRIBE_SEGMENT_SECONDS", "60"))
+TRANSCRIBE_SEGMENT_OVERLAP = float(os.getenv("TRANSCRIBE_SEGMENT_OVERLAP", "2"))
+# Putaran ulang untuk segmen yang gagal (setelah retry per-request habis)
+TRANSCRIBE_SEGMENT_RETRIES = int(os.getenv("TRANSCRIBE_SEGMENT_RETRIES", "2"))
+# Jumlah kata maksimum yang dicek saat membuang duplikat di area overlap
+MAX_OVERLAP_WORDS = 30
+
+# Satu AsyncClient per proses: koneksi keep-alive ke Kobold dipakai ulang antar transcription
+_client: Optional[httpx.AsyncClient] = None
+_semaphore: Optional[asyncio.Semaphore] = None
+
+
+def _get_client() -> httpx.AsyncClient:
+    global _client, _semaphore
+    if _client is None:
+        _client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=KOBOLD_MAX_CONCURRENCY,
+                max_keepalive_connections=KOBOLD_MAX_CONCURRENCY
+            ),
+            timeout=httpx.Timeout(
+                connect=KOBOLD_CONNECT_TIMEOUT,
+                read=KOBOLD_READ_TIMEOUT,
+                write=KOBOLD_READ_TIMEOUT,
+                pool=None
+            )
+        )
+        _semaphore = asyncio.Semaphore(KOBOLD_MAX_CONCURRENCY)
+    return _client
+
+
+async def close_http_client():
+    global _client, _semaphore
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+        _semaphore = None
+
+
+def extract_audio_from_video(video_path: str, output_path: Optional[str] = None) -> str:
+    """Extract audio as 16kHz mono WAV from a video using ffmpeg."""
     if not os.path.exists(video_path):
         raise FileNotFoundError(f"Video file not found: {video_path}")
 
-    temp_wav = tempfile.NamedTemporaryFile(suffix=".wav", delete=False).name
+    temp_wav = output_path or tempfile.NamedTemporaryFile(suffix=".wav", delete=False).name
     print(f"🎞️ Extracting audio from video → {temp_wav}")
 
     cmd = [
@@ -36,48 +86,205 @@ def extract_audio_from_video(video_path: str) -> str:
         raise RuntimeError("Failed to extract audio using ffmpeg. Make sure ffmpeg is installed.")
 
 
-def _call_kobold_extra_transcribe(audio_path: str):
+async def _call_kobold_extra_transcribe(audio_path: str):
     """Send the extracted WAV audio file to the Kobold /api/extra/transcribe endpoint."""
     url = f"{KOBOLD_API_BASE}/api/extra/transcribe"
-    headers = {
-        "Content-Type": "application/json",
-        "Authorization": f"Bearer {KOBOLD_API_KEY}"
-    } if KOBOLD_API_KEY else {"Content-Type": "application/json"}
 
-    print(f"🎤 Sending transcription request to: {url}")
+    print(f"🎤 Sending transcription request to: {url} (mode: {KOBOLD_TRANSCRIBE_MODE})")
     print(f"Audio file: {audio_path}")
 
-    with open(audio_path, "rb") as f:
-        audio_base64 = base64.b64encode(f.read()).decode("utf-8")
-
-    payload = {
-        "audio_data": f"data:audio/wav;base64,{audio_base64}",
+    fields = {
         "langcode": "auto",
         "prompt": "",
         "suppress_non_speech": False
     }
+    # Body di-stream dari file (base64 di-encode per chunk untuk mode json),
+    # jadi audio tidak pernah dimuat utuh ke memori
+    body, content_type, params = transport.build_transcribe_body(audio_path, fields, KOBOLD_TRANSCRIBE_MODE)
 
-    r = requests.post(url, headers=headers, data=json.dumps(payload), timeout=300)
-    print(f"Response status: {r.status_code}")
-    print(f"Response text: {r.text}")
+    headers = {
+        "Content-Type": content_type,
+        "Content-Length": str(len(body))
+    }
+    if KOBOLD_API_KEY:
+        headers["Authorization"] = f"Bearer {KOBOLD_API_KEY}"
 
-    r.raise_for_status()
-    return r.json()
+    client = _get_client()
+    attempt = 0
+    while True:
+        attempt += 1
+        try:
+            async with _semaphore:
+                r = await client.post(url, headers=headers, params=params, content=body.aiter_chunks())
+            print(f"Response status: {r.status_code}")
+            print(f"Response text: {r.text}")
 
+            if r.status_code in RETRY_STATUS_CODES and attempt <= KOBOLD_MAX_RETRIES:
+                raise httpx.HTTPStatusError(f"Retryable status {r.status_code}", request=r.request, response=r)
+            r.raise_for_status()
+            return r.json()
+        except (httpx.TransportError, httpx.HTTPStatusError) as e:
+            retryable = isinstance(e, httpx.TransportError) or e.response.status_code in RETRY_STATUS_CODES
+            if not retryable or attempt > KOBOLD_MAX_RETRIES:
+                raise
+            delay = KOBOLD_RETRY_BACKOFF * (2 ** (attempt - 1))
+            print(f"Transcribe request failed ({e}), retry {attempt}/{KOBOLD_MAX_RETRIES} in {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+
+def split_wav(wav_path: str, segment_seconds: float, overlap_seconds: float) -> List[Tuple[float, float, str]]:
+    """
+    Potong WAV PCM jadi beberapa file segmen dengan overlap.
+    Return list (start_s, end_s, path); path = wav_path kalau tidak perlu dipotong.
+    """
+    with wave.open(wav_path, "rb") as src:
+        params = src.getparams()
+        rate = src.getframerate()
+        total_frames = src.getnframes()
+
+        segment_frames = int(segment_seconds * rate)
+        overlap_frames = int(overlap_seconds * rate)
+        if segment_frames <= 0 or total_frames <= segment_frames:
+            return [(0.0, total_frames / rate, wav_path)]
+
+        step = max(1, segment_frames - overlap_frames)
+        segments = []
+        start = 0
+        while start < total_frames:
+            end = min(start + segment_frames, total_frames)
+            src.setpos(start)
+            frames = src.readframes(end - start)
+
+            seg_path = tempfile.NamedTemporaryFile(suffix=".wav", delete=False).name
+            with wave.open(seg_path, "wb") as dst:
+                dst.setparams(params)
+                dst.writeframes(frames)
+            segments.append((start / rate, end / rate, seg_path))
+
+            if end >= total_frames:
+                break
+            start += step
+    return segments
+
+
+def _merge_overlap(previous: List[str], current: List[str]) -> List[str]:
+    """Buang kata di awal segmen yang sama dengan akhir segmen sebelumnya (area overlap)."""
+    max_n = min(len(previous), len(current), MAX_OVERLAP_WORDS)
+
+    def normalize(words):
+        return [w.lower().strip(".,!?;:") for w in words]
+
+    prev_tail = normalize(previous[-max_n:]) if max_n else []
+    curr_head = normalize(current[:max_n])
+    for n in range(max_n, 0, -1):
+        if prev_tail[-n:] == curr_head[:n]:
+            return current[n:]
+    return current
+
+
+def stitch_segments(segments: List[Dict[str, Any]]) -> str:
+    words: List[str] = []
+    for segment in segments:
+        segment_words = segment["text"].split()
+        words.extend(_merge_overlap(words, segment_words))
+    return " ".join(words)
+
+
+async def _transcribe_segment(path: str) -> str:
+    result = await _call_kobold_extra_transcribe(path)
+    return (result.get("text") or result.get("transcription") or "").strip()
+
+
+def _partial_result(texts: Dict[int, str], count: int) -> Dict[str, Any]:
+    return {
+        "segment_seconds": TRANSCRIBE_SEGMENT_SECONDS,
+        "overlap": TRANSCRIBE_SEGMENT_OVERLAP,
+        "count": count,
+        "texts": {str(i): text for i, text in texts.items()},
+    }
+
+
+def _reuse_partial(partial: Optional[Dict[str, Any]], count: int) -> Dict[int, str]:
+    # Hanya valid kalau audio dipotong dengan cara yang sama
+    if not partial or partial.get("count") != count \
+            or partial.get("segment_seconds") != TRANSCRIBE_SEGMENT_SECONDS \
+            or partial.get("overlap") != TRANSCRIBE_SEGMENT_OVERLAP:
+        return {}
+    return {int(i): text for i, text in partial.get("texts", {}).items()}
+
+
+async def transcribe_wav(wav_path: str, partial: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Transcribe a 16kHz mono WAV that is already on disk (file is left in place).
+    Audio panjang dipecah per TRANSCRIBE_SEGMENT_SECONDS dan dikirim paralel
+    (dibatasi KOBOLD_MAX_CONCURRENCY); segmen yang gagal diulang sendiri-sendiri.
+    Kalau tetap ada yang gagal, result error berisi "partial" (segmen yang sudah
+    selesai); kirim balik lewat partial supaya percobaan berikutnya hanya
+    mengulang segmen yang gagal.
+    """
+    try:
+        pieces = await asyncio.to_thread(
+            split_wav, wav_path, TRANSCRIBE_SEGMENT_SECONDS, TRANSCRIBE_SEGMENT_OVERLAP
+        )
+    except (wave.Error, EOFError) as e:
+        # Bukan WAV PCM biasa, kirim utuh seperti sebelumnya
+        print(f"Cannot segment {wav_path} ({e}), sending as one request")
+        pieces = [(0.0, None, wav_path)]
 
-async def get_transcript_from_audio(audio_path: str) -> Dict[str, Any]:
-    """Extract audio then get transcript from a video file using the Kobold API."""
     try:
-        wav_path = extract_audio_from_video(audio_path)
-        result = _call_kobold_extra_transcribe(wav_path)
+        texts = _reuse_partial(partial, len(pieces))
+        errors = []
+        for round_no in range(TRANSCRIBE_SEGMENT_RETRIES + 1):
+            todo = [i for i in range(len(pieces)) if i not in texts]
+            if not todo:
+                break
+            if round_no:
+                delay = KOBOLD_RETRY_BACKOFF * (2 ** round_no)
+                print(f"Retrying {len(todo)} failed segment(s) of {wav_path} in {delay:.1f}s")
+                await asyncio.sleep(delay)
+            results = await asyncio.gather(
+                *(_transcribe_segment(pieces[i][2]) for i in todo), return_exceptions=True
+            )
+            errors = []
+            for i, result in zip(todo, results):
+                if isinstance(result, BaseException):
+                    errors.append(result)
+                else:
+                    texts[i] = result
+
+        if errors:
+            return {
+                "text": "",
+                "status": "error",
+                "reason": f"{len(errors)}/{len(pieces)} segment gagal: {errors[0]}",
+                "partial": _partial_result(texts, len(pieces)),
+            }
 
-        text = result.get("text") or result.get("transcription") or ""
+        segments = [
+            {"start": round(start, 2), "end": round(end, 2) if end is not None else None, "text": texts[i]}
+            for i, (start, end, _) in enumerate(pieces)
+        ]
+        text = stitch_segments(segments)
         status = "success" if text else "empty"
+        return {"text": text, "status": status, "segments": segments}
+    except Exception as e:
+        return {"text": "", "status": "error", "reason": str(e)}
+    finally:
+        for _, _, path in pieces:
+            if path != wav_path and os.path.exists(path):
+                os.remove(path)
 
-        # Cleanup
-        if os.path.exists(wav_path):
-            os.remove(wav_path)
 
-        return {"text": text, "status": status}
+async def get_transcript_from_audio(audio_path: str) -> Dict[str, Any]:
+    """Extract audio then get transcript from a video file using the Kobold API."""
+    try:
+        wav_path = await asyncio.to_thread(extract_audio_from_video, audio_path)
     except Exception as e:
         return {"text": "", "status": "error", "reason": str(e)}
+
+    try:
+        return await transcribe_wav(wav_path)
+    finally:
+        # Cleanup
+        if os.path.exists(wav_path):
+            os.remove(wav_path)
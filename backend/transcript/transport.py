@@ -0,0 +1,129 @@
+import os
+import json
+import asyncio
+import base64
+import uuid
+from typing import Dict, Any, List, Tuple, Union
+
+# Kelipatan 3 supaya tiap chunk base64 bisa di-encode terpisah tanpa padding di tengah
+READ_CHUNK = 3 * 64 * 1024
+
+
+class FilePart:
+    """Isi file di disk, opsional di-encode base64 sambil dibaca."""
+
+    def __init__(self, path: str, b64: bool = False):
+        self.path = path
+        self.b64 = b64
+        self.size = os.path.getsize(path)
+
+    def __len__(self):
+        if self.b64:
+            return 4 * ((self.size + 2) // 3)
+        return self.size
+
+    def iter_chunks(self):
+        with open(self.path, "rb") as f:
+            while True:
+                chunk = f.read(READ_CHUNK)
+                if not chunk:
+                    break
+                yield base64.b64encode(chunk) if self.b64 else chunk
+
+
+class StreamingBody:
+    """
+    Body request berupa file-like object yang disusun dari potongan bytes dan
+    FilePart. Panjang total diketahui di depan (Content-Length), dan isinya
+    dibaca per chunk, jadi memori per request tetap kecil berapa pun ukuran audio.
+    """
+
+    def __init__(self, parts: List[Union[bytes, FilePart]]):
+        self.parts = parts
+        self._iter = None
+        self._buffer = b""
+
+    def __len__(self):
+        return sum(len(p) for p in self.parts)
+
+    def __iter__(self):
+        for part in self.parts:
+            if isinstance(part, FilePart):
+                yield from part.iter_chunks()
+            else:
+                yield part
+
+    async def aiter_chunks(self):
+        # Untuk httpx.AsyncClient: baca file di thread supaya event loop tidak ikut nunggu disk.
+        # Tiap iterasi mulai dari awal, jadi body aman dipakai ulang saat retry.
+        chunks = iter(self)
+        while True:
+            chunk = await asyncio.to_thread(next, chunks, None)
+            if chunk is None:
+                break
+            yield chunk
+
+    def read(self, size: int = -1) -> bytes:
+        if self._iter is None:
+            self._iter = iter(self)
+        while size < 0 or len(self._buffer) < size:
+            try:
+                self._buffer += next(self._iter)
+            except StopIteration:
+                break
+        if size < 0:
+            data, self._buffer = self._buffer, b""
+        else:
+            data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+
+def json_body(audio_path: str, fields: Dict[str, Any]) -> Tuple[StreamingBody, str]:
+    """JSON {"audio_data": "data:audio/wav;base64,...", ...} dengan base64 di-encode incremental."""
+    prefix = b'{"audio_data": "data:audio/wav;base64,'
+    suffix = b'"'
+    for key, value in fields.items():
+        suffix += f", {json.dumps(key)}: {json.dumps(value)}".encode("utf-8")
+    suffix += b"}"
+    return StreamingBody([prefix, FilePart(audio_path, b64=True), suffix]), "application/json"
+
+
+def multipart_body(audio_path: str, fields: Dict[str, Any], file_field: str = "file") -> Tuple[StreamingBody, str]:
+    boundary = uuid.uuid4().hex
+    parts: List[Union[bytes, FilePart]] = []
+    for key, value in fields.items():
+        if isinstance(value, bool):
+            value = "true" if value else "false"
+        parts.append(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{key}"\r\n\r\n{value}\r\n'.encode("utf-8")
+        )
+    filename = os.path.basename(audio_path)
+    parts.append(
+        f'--{boundary}\r\nContent-Disposition: form-data; name="{file_field}"; filename="{filename}"\r\n'
+        f"Content-Type: audio/wav\r\n\r\n".encode("utf-8")
+    )
+    parts.append(FilePart(audio_path))
+    parts.append(f"\r\n--{boundary}--\r\n".encode("utf-8"))
+    return StreamingBody(parts), f"multipart/form-data; boundary={boundary}"
+
+
+def raw_body(audio_path: str) -> Tuple[StreamingBody, str]:
+    return StreamingBody([FilePart(audio_path)]), "audio/wav"
+
+
+def build_transcribe_body(audio_path: str, fields: Dict[str, Any], mode: str = "json"):
+    """
+    Return (body, content_type, params). Mode:
+    - json: format asli Kobold /api/extra/transcribe (base64 di JSON, di-stream)
+    - multipart: untuk backend yang terima upload form-data
+    - raw: body = WAV mentah, field lain lewat query string
+    """
+    if mode == "multipart":
+        body, content_type = multipart_body(audio_path, fields)
+        return body, content_type, None
+    if mode == "raw":
+        body, content_type = raw_body(audio_path)
+        params = {k: (str(v).lower() if isinstance(v, bool) else v) for k, v in fields.items()}
+        return body, content_type, params
+    body, content_type = json_body(audio_path, fields)
+    return body, content_type, None
@@ -0,0 +1,16 @@
+import api from "./axios";
+
+// Submit transcription job lalu poll status-nya sampai done / failed
+export const transcribeAnswer = async (answerId, intervalMs = 2000) => {
+    const { data } = await api.post(`/transcript/transcribe/${answerId}`);
+    let job = data;
+    while (job.status === "queued" || job.status === "running") {
+        await new Promise((resolve) => setTimeout(resolve, intervalMs));
+        const response = await api.get(`/transcript/jobs/${job.job_id}`);
+        job = response.data;
+    }
+    if (job.status === "failed") {
+        throw new Error(job.error || "Transcription failed");
+    }
+    return job;
+};
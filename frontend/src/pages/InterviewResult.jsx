@@ -1,5 +1,6 @@
 import React, { useEffect, useState } from 'react';
 import api from '../api/axios';
+import { transcribeAnswer } from '../api/transcription';
 import { FileText, SquarePlay, Loader, AlertCircle, X } from 'lucide-react';
 
 export default function InterviewResult() {
@@ -13,7 +14,7 @@ export default function InterviewResult() {
 
   const fetchAnswers = async () => {
     try {
-              const response = await api.get('/video/answers/all');      setAnswers(response.data);
+              const response = await api.get('/video/answers/all?fields=transcript');      setAnswers(response.data);
       
       // Group answers by user
       const grouped = response.data.reduce((acc, answer) => {
@@ -44,7 +45,7 @@ export default function InterviewResult() {
   const handleTranscript = async (answerId) => {
     setIsTranscribing(prev => ({ ...prev, [answerId]: true }));
     try {
-      await api.post(`/transcript/transcribe/${answerId}`);
+      await transcribeAnswer(answerId);
       // Re-fetch all answers to get the updated transcript
       await fetchAnswers(); 
     } catch (err) {
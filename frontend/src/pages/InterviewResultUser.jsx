@@ -1,5 +1,6 @@
 import React, { useEffect, useState } from 'react';
 import api from '../api/axios';
+import { transcribeAnswer } from '../api/transcription';
 import { FileText, SquarePlay, Loader, AlertCircle, X } from 'lucide-react';
 import { useAuth } from '../hooks/useAuth'; // Import useAuth
 
@@ -33,7 +34,7 @@ export default function InterviewResultUser() {
   const handleTranscript = async (answerId) => {
     setIsTranscribing(prev => ({ ...prev, [answerId]: true }));
     try {
-      await api.post(`/transcript/transcribe/${answerId}`);
+      await transcribeAnswer(answerId);
       await fetchAnswers(); // Re-fetch to get updated transcript
     } catch (err) {
       alert('Failed to transcribe video. Please try again.');
@@ -24,7 +24,7 @@ export default function MatchingCandidates() {
         }
 
         // Fetch candidates with answers
-        const candidatesResponse = await api.get('/video/answers/all');
+        const candidatesResponse = await api.get('/video/answers/all?fields=transcript');
         // Group answers by user to get unique candidates
         const groupedCandidates = candidatesResponse.data.reduce((acc, answer) => {
           if (!acc[answer.user.id]) {